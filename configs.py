@@ -107,6 +107,139 @@ def get_parser():
         help="the meta solver",
     )
 
+    parser.add_argument(
+        "--alpharank_method",
+        type=str,
+        default="sink_scc",
+        help="How the alpha_rank meta solver reaches infinite alpha: sweep | sink_scc",
+    )
+
+    parser.add_argument(
+        "--ce_method",
+        type=str,
+        default="lp",
+        help="How the ce meta solver is computed: lp | regret_matching",
+    )
+
+    parser.add_argument(
+        "--warm_start_solver",
+        action="store_true",
+        default=False,
+        help="Warm-start the meta solver from the previous step's solution",
+    )
+
+    parser.add_argument(
+        "--warm_start_budget",
+        type=float,
+        default=1.0,
+        help="Fraction of the meta solver iterations used when warm-started",
+    )
+
+    parser.add_argument(
+        "--solver_tol",
+        type=float,
+        default=None,
+        help="Early-stopping tolerance of the iterative meta solvers (None: off)",
+    )
+
+    parser.add_argument(
+        "--solver_check_every",
+        type=int,
+        default=100,
+        help="Iterations between two convergence checks of the meta solvers",
+    )
+
+    parser.add_argument(
+        "--solver_convergence_metric",
+        type=str,
+        default="strategy",
+        help="Convergence residual of the meta solvers: strategy | nash_conv",
+    )
+
+    parser.add_argument(
+        "--dataset_workers",
+        type=int,
+        default=0,
+        help="Processes generating the games from per-game seeds (0: serial, global RNG)",
+    )
+
+    parser.add_argument(
+        "--dataset_cache_dir",
+        type=str,
+        default=None,
+        help="Directory caching the seeded datasets, keyed by the generation args",
+    )
+
+    parser.add_argument(
+        "--game_generator",
+        type=str,
+        default="parafac",
+        help="How games are drawn: parafac (decompose random tables) | cp (sample CP factors)",
+    )
+
+    parser.add_argument(
+        "--decomposition_batch_size",
+        type=int,
+        default=256,
+        help="Same-shaped games decomposed together by batched ALS (0: one parafac per game)",
+    )
+
+    parser.add_argument(
+        "--augment_number",
+        type=int,
+        default=0,
+        help="Random player/action permutations added per training game (0: none)",
+    )
+
+    parser.add_argument(
+        "--augment_flip_prob",
+        type=float,
+        default=0.5,
+        help="Probability of negating a player's payoffs in an augmented game",
+    )
+
+    parser.add_argument(
+        "--augment_min_scale",
+        type=float,
+        default=0.5,
+        help="Smallest random scale of a player's payoffs in an augmented game",
+    )
+
+    parser.add_argument(
+        "--prd_iterations",
+        type=int,
+        default=None,
+        help="Iterations of the prd meta solver (None: the env's default)",
+    )
+
+    parser.add_argument(
+        "--ce_iterations",
+        type=int,
+        default=5000,
+        help="Iterations of the regret-matching ce meta solver",
+    )
+
+    parser.add_argument(
+        "--fp_iterations",
+        type=int,
+        default=5000,
+        help="Iterations of the fp meta solver",
+    )
+
+    parser.add_argument(
+        "--solver_cache_size",
+        type=int,
+        default=1024,
+        help="Number of meta solver results kept in the LRU cache (0: off)",
+    )
+
+    parser.add_argument(
+        "--precompute_game_stats",
+        type=str,
+        default="test",
+        help="Datasets whose initial meta solver results are precomputed: none | test | all",
+    )
+
     # node_output_size
     parser.add_argument(
         "--node_output_size",
@@ -0,0 +1,160 @@
+"""Batched CP decomposition of stacks of same-shaped tensors.
+
+Decomposing the games one by one with tensorly.decomposition.parafac spends
+most of its time in Python overhead for small payoff tables. batch_parafac()
+runs the same alternating least squares (ALS) updates, with the same random
+initialization and optional line search, for a whole [B, d_1, ..., d_k] stack
+at once. Each item keeps its own convergence state, and items whose factors
+become NaN are re-initialized alone.
+"""
+
+import numpy as np
+
+# Line search parameters of tensorly.decomposition.parafac
+LINESEARCH_ACC_POW = 2.0
+LINESEARCH_MAX_FAIL = 4
+
+
+def _khatri_rao(factors):
+    """Returns the [B, d_1 * ... * d_k, rank] Khatri-Rao products of factors."""
+    product = factors[0]
+    for factor in factors[1:]:
+        product = product[:, :, None, :] * factor[:, None, :, :]
+        product = product.reshape(len(product), -1, product.shape[-1])
+    return product
+
+
+def batch_cp_to_tensor(factors):
+    """Returns the [B, d_1, ..., d_k] tensors of [B, d_i, rank] CP factors."""
+    shape = [factor.shape[1] for factor in factors]
+    return np.sum(_khatri_rao(factors), axis=-1).reshape([-1] + shape)
+
+
+def _relative_errors(tensors, norms, factors):
+    residuals = tensors - batch_cp_to_tensor(factors)
+    return np.sqrt(np.sum(residuals.reshape(len(tensors), -1) ** 2, axis=1)) / norms
+
+
+def _als_step(tensors, factors):
+    """Updates in place each factor in turn with its least squares solution."""
+    batch_size = len(tensors)
+    for mode in range(len(factors)):
+        others = [factors[i] for i in range(len(factors)) if i != mode]
+        gram = np.ones((batch_size,) + factors[mode].shape[-1:] * 2)
+        for factor in others:
+            gram = gram * np.matmul(np.swapaxes(factor, 1, 2), factor)
+        unfolded = np.moveaxis(tensors, mode + 1, 1).reshape(
+            batch_size, tensors.shape[mode + 1], -1
+        )
+        mttkrp = np.matmul(unfolded, _khatri_rao(others))
+        try:
+            solution = np.linalg.solve(gram, np.swapaxes(mttkrp, 1, 2))
+            factors[mode] = np.swapaxes(solution, 1, 2)
+        except np.linalg.LinAlgError:
+            # Some Gram matrices are singular, fall back on pseudo-inverses
+            factors[mode] = np.matmul(mttkrp, np.linalg.pinv(gram, hermitian=True))
+
+
+def _random_factors(batch_size, shape, rank):
+    return [np.random.random_sample((batch_size, dim, rank)) for dim in shape]
+
+
+def batch_parafac(
+    tensors, rank, n_iter_max=100, tol=1e-8, linesearch=False, max_restarts=10
+):
+    """CP decomposition of every tensor of a stack, by batched ALS.
+
+    Args:
+      tensors: array of shape [B, d_1, ..., d_k].
+      rank: number of components of the decompositions.
+      n_iter_max: maximal number of ALS iterations per item.
+      tol: an item stops once its relative reconstruction error changes by
+        less than tol between two iterations, as in parafac.
+      linesearch: whether to extrapolate the factors every other iteration,
+        as parafac(linesearch=True) does.
+      max_restarts: how many times an item whose factors became NaN is
+        re-initialized before giving up.
+
+    Returns:
+      (weights, factors): the [B, rank] weights, which are all ones, and the
+      list of the [B, d_i, rank] factors of each mode.
+
+    Raises:
+      ValueError: if an item still diverges after max_restarts restarts.
+    """
+    tensors = np.asarray(tensors, dtype=float)
+    batch_size, shape = tensors.shape[0], tensors.shape[1:]
+    norms = np.sqrt(np.sum(tensors.reshape(batch_size, -1) ** 2, axis=1))
+
+    factors = _random_factors(batch_size, shape, rank)
+    last_factors = [np.copy(factor) for factor in factors]
+    rec_errors = np.full(batch_size, np.inf)
+    iterations = np.zeros(batch_size, dtype=int)
+    restarts = np.zeros(batch_size, dtype=int)
+    acc_pow = np.full(batch_size, LINESEARCH_ACC_POW)
+    acc_fail = np.zeros(batch_size, dtype=int)
+    active = np.ones(batch_size, dtype=bool)
+
+    while active.any():
+        idx = np.flatnonzero(active)
+        batch_tensors = tensors[idx]
+        batch_factors = [factor[idx] for factor in factors]
+        iteration = iterations[idx]
+
+        if linesearch:
+            save = iteration % 2 == 0
+            for factor, last_factor in zip(batch_factors, last_factors):
+                last_factor[idx[save]] = factor[save]
+
+        _als_step(batch_tensors, batch_factors)
+        errors = _relative_errors(batch_tensors, norms[idx], batch_factors)
+
+        if linesearch:
+            line_iter = (iteration % 2 == 0) & (iteration > 5)
+            if line_iter.any():
+                jump = (iteration ** (1.0 / acc_pow[idx]))[:, None, None]
+                new_factors = [
+                    last_factor[idx] + (factor - last_factor[idx]) * jump
+                    for factor, last_factor in zip(batch_factors, last_factors)
+                ]
+                new_errors = _relative_errors(batch_tensors, norms[idx], new_factors)
+                accept = line_iter & (new_errors < rec_errors[idx])
+                for factor, new_factor in zip(batch_factors, new_factors):
+                    factor[accept] = new_factor[accept]
+                errors = np.where(accept, new_errors, errors)
+
+                acc_fail[idx[accept]] = 0
+                acc_fail[idx[line_iter & ~accept]] += 1
+                reduce = idx[acc_fail[idx] == LINESEARCH_MAX_FAIL]
+                acc_pow[reduce] += 1.0
+                acc_fail[reduce] = 0
+
+        diverged = ~np.isfinite(errors)
+        for factor in batch_factors:
+            diverged |= ~np.isfinite(factor).reshape(len(idx), -1).all(axis=1)
+        converged = ~diverged & (np.abs(rec_errors[idx] - errors) < tol)
+
+        for factor, batch_factor in zip(factors, batch_factors):
+            factor[idx] = batch_factor
+        rec_errors[idx] = errors
+        iterations[idx] += 1
+        active[idx[converged | (iterations[idx] >= n_iter_max)]] = False
+
+        if diverged.any():
+            failed = idx[diverged]
+            restarts[failed] += 1
+            if (restarts[failed] > max_restarts).any():
+                raise ValueError(
+                    "CP decomposition diverged after {} restarts".format(max_restarts)
+                )
+            for factor, new_factor in zip(
+                factors, _random_factors(len(failed), shape, rank)
+            ):
+                factor[failed] = new_factor
+            rec_errors[failed] = np.inf
+            iterations[failed] = 0
+            acc_pow[failed] = LINESEARCH_ACC_POW
+            acc_fail[failed] = 0
+            active[failed] = True
+
+    return np.ones((batch_size, rank)), factors
@@ -1,17 +1,84 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+
 import numpy as np
+import tensorly as tl
 from tensorly.decomposition import parafac
 
+from game2graph.cp_decomposition import batch_parafac
 from game2graph.response_graphs import (
     alpha_rank_response_graph,
     alpha_rank_response_graph_inf_alpha,
 )
 from utils import normalize_tables
 
+# Generation arguments that determine a seeded dataset
+DATASET_ARGS = [
+    "seed",
+    "min_players",
+    "max_players",
+    "min_actions",
+    "max_actions",
+    "min_val",
+    "max_val",
+    "action_size",
+    "game_generator",
+    "train_number",
+    "test_number",
+]
+DATASET_FORMAT_VERSION = 1
+# Arguments that the precomputed game_stats of a dataset depend on
+GAME_STATS_ARGS = [
+    "meta_solver",
+    "alpharank_method",
+    "ce_method",
+    "warm_start_solver",
+    "warm_start_budget",
+    "prd_iterations",
+    "ce_iterations",
+    "fp_iterations",
+    "solver_tol",
+    "solver_check_every",
+    "solver_convergence_metric",
+    "m",
+    "alpha",
+    "use_inf_alpha",
+]
+
 
 def gen_game_datasets(args):
+    train_dataset, test_dataset = gen_base_game_datasets(args)
+    if args.augment_number > 0:
+        train_dataset = augment_game_dataset(train_dataset, args)
+    return train_dataset, test_dataset
+
+
+def gen_base_game_datasets(args):
     train_number = args.train_number
     test_number = args.test_number
 
+    if args.dataset_cache_dir is not None:
+        path = dataset_cache_path(args)
+        if os.path.exists(path):
+            games = load_game_dataset(path, stats_file=game_stats_file(args))
+        else:
+            games = gen_seeded_games(args, train_number + test_number)
+            save_game_dataset(path, games)
+        return games[:train_number], games[train_number:]
+
+    if args.dataset_workers > 0:
+        games = gen_seeded_games(args, train_number + test_number)
+        return games[:train_number], games[train_number:]
+
+    if args.game_generator == "parafac" and args.decomposition_batch_size > 0:
+        games = gen_batched_games(args, train_number + test_number)
+        return games[:train_number], games[train_number:]
+
     train_dataset = []
     test_dataset = []
 
@@ -26,7 +93,175 @@ def gen_game_datasets(args):
     return train_dataset, test_dataset
 
 
-def gen_game(args):
+def game_seeds(seed, number):
+    """Returns the seed of each game, derived from seed and the game's index."""
+    return [
+        int(np.random.SeedSequence(seed, spawn_key=(i,)).generate_state(1)[0])
+        for i in range(number)
+    ]
+
+
+def _gen_seeded_game(args_and_seed):
+    args, seed = args_and_seed
+    np.random.seed(seed)
+    return gen_game(args)
+
+
+def gen_seeded_games(args, number):
+    """Generates games with per-game seeds, using args.dataset_workers processes.
+
+    Game i only depends on args.seed and i, so the games are identical whatever
+    the number of workers.
+    """
+    tasks = [(args, seed) for seed in game_seeds(args.seed, number)]
+    if args.dataset_workers <= 1:
+        # Leave the caller's global random state untouched
+        state = np.random.get_state()
+        games = [_gen_seeded_game(task) for task in tasks]
+        np.random.set_state(state)
+        return games
+    with multiprocessing.Pool(args.dataset_workers) as pool:
+        return pool.map(_gen_seeded_game, tasks, chunksize=8)
+
+
+def _args_digest(args, names):
+    config = {name: getattr(args, name, None) for name in names}
+    config["version"] = DATASET_FORMAT_VERSION
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def dataset_cache_path(args):
+    """Returns the cache directory of the dataset generated from args."""
+    return os.path.join(
+        args.dataset_cache_dir, "games_{}".format(_args_digest(args, DATASET_ARGS))
+    )
+
+
+def game_stats_file(args):
+    """Returns the name of the game_stats file precomputed with args."""
+    return "game_stats_{}.pkl".format(_args_digest(args, GAME_STATS_ARGS))
+
+
+def _dump_game_stats(stats_path, dataset):
+    with open(stats_path, "wb") as f:
+        pickle.dump([game[3] if len(game) > 3 else None for game in dataset], f)
+
+
+def save_game_stats(path, dataset, stats_file):
+    """Stores the game_stats of a dataset already saved by save_game_dataset().
+
+    The file is written under a temporary name and then renamed, so readers
+    never see a partial file.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=path)
+    os.close(fd)
+    try:
+        _dump_game_stats(tmp_path, dataset)
+        os.replace(tmp_path, os.path.join(path, stats_file))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def cache_game_stats(args, train_dataset, test_dataset):
+    """Stores the game_stats precomputed on a cached dataset next to it.
+
+    The stats are keyed on GAME_STATS_ARGS, and gen_game_datasets() attaches
+    them again when it loads the dataset with the same arguments. Augmented
+    games, which follow the base training games, are not cached.
+    """
+    if args.dataset_cache_dir is None:
+        return
+    save_game_stats(
+        dataset_cache_path(args),
+        train_dataset[: args.train_number] + test_dataset,
+        game_stats_file(args),
+    )
+
+
+def save_game_dataset(path, dataset, stats_file="game_stats.pkl"):
+    """Stores a list of (payoff_tables, weights, factors[, game_stats]) games.
+
+    Games are bucketed by payoff shape, and each bucket is written as one .npy
+    file per array so that load_game_dataset() can memory-map it. Precomputed
+    game_stats, which hold arbitrary objects, are pickled alongside. The files
+    are written to a private temporary directory that is then renamed to path,
+    and if another process stored the same dataset first, its copy is kept.
+    """
+    buckets = {}
+    for idx, game in enumerate(dataset):
+        buckets.setdefault(np.shape(game[0]), []).append(idx)
+
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix=".tmp_", dir=cache_dir)
+    manifest = {
+        "version": DATASET_FORMAT_VERSION,
+        "num_games": len(dataset),
+        "buckets": [],
+    }
+    for bucket, (shape, indices) in enumerate(sorted(buckets.items())):
+        games = [dataset[idx] for idx in indices]
+        prefix = os.path.join(tmp_path, "bucket{}_".format(bucket))
+        np.save(prefix + "payoffs.npy", np.stack([game[0] for game in games]))
+        np.save(prefix + "weights.npy", np.stack([game[1] for game in games]))
+        for player in range(len(games[0][2])):
+            np.save(
+                prefix + "factor{}.npy".format(player),
+                np.stack([game[2][player] for game in games]),
+            )
+        manifest["buckets"].append(
+            {
+                "shape": list(shape),
+                "num_factors": len(games[0][2]),
+                "indices": indices,
+            }
+        )
+    if any(len(game) > 3 for game in dataset):
+        _dump_game_stats(os.path.join(tmp_path, stats_file), dataset)
+    with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.exists(path):
+            raise
+
+
+def load_game_dataset(path, mmap_mode="r", stats_file="game_stats.pkl"):
+    """Loads a dataset stored by save_game_dataset(), memory-mapping its arrays."""
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    dataset = [None] * manifest["num_games"]
+    for bucket, info in enumerate(manifest["buckets"]):
+        prefix = os.path.join(path, "bucket{}_".format(bucket))
+        payoffs = np.load(prefix + "payoffs.npy", mmap_mode=mmap_mode)
+        weights = np.load(prefix + "weights.npy", mmap_mode=mmap_mode)
+        factors = [
+            np.load(prefix + "factor{}.npy".format(player), mmap_mode=mmap_mode)
+            for player in range(info["num_factors"])
+        ]
+        for j, idx in enumerate(info["indices"]):
+            dataset[idx] = (
+                np.asarray(payoffs[j]),
+                np.asarray(weights[j]),
+                [np.asarray(factor[j]) for factor in factors],
+            )
+
+    stats_path = os.path.join(path, stats_file)
+    if os.path.exists(stats_path):
+        with open(stats_path, "rb") as f:
+            game_stats = pickle.load(f)
+        dataset = [
+            game if stats is None else game + (stats,)
+            for game, stats in zip(dataset, game_stats)
+        ]
+    return dataset
+
+
+def gen_game_shape(args):
+    """Draws the number of players and the number of actions of each player."""
     min_players = args.min_players
     max_players = args.max_players
     max_actions = args.max_actions
@@ -40,6 +275,14 @@ def gen_game(args):
         np.random.randint(low=min_actions, high=max_actions + 1)
         for _ in range(num_players)
     ]
+    return num_players, action_dims
+
+
+def gen_game(args):
+    if args.game_generator == "cp":
+        return gen_cp_game(args)
+
+    num_players, action_dims = gen_game_shape(args)
 
     payoff_tables, weights, factors = None, None, None
     while True:
@@ -76,6 +319,132 @@ def gen_game(args):
     return payoff_tables, weights, factors
 
 
+def gen_batched_games(args, number):
+    """Draws games like gen_game, decomposing same-shaped tables in batches.
+
+    The game shapes are drawn first, then the games of each shape are
+    decomposed args.decomposition_batch_size at a time by batch_parafac().
+    """
+    buckets = {}
+    for idx in range(number):
+        num_players, action_dims = gen_game_shape(args)
+        buckets.setdefault(tuple([num_players] + action_dims), []).append(idx)
+
+    games = [None] * number
+    batch_size = args.decomposition_batch_size
+    for shape, indices in sorted(buckets.items()):
+        for start in range(0, len(indices), batch_size):
+            chunk = indices[start : start + batch_size]
+            payoff_tables = np.stack(
+                [
+                    normalize_tables(
+                        tables=np.random.random(shape),
+                        max_val=args.max_val,
+                        min_val=args.min_val,
+                    )
+                    for _ in chunk
+                ]
+            )
+            weights, factors = batch_parafac(
+                payoff_tables,
+                rank=args.action_size,
+                n_iter_max=int(1e3),
+                tol=1.0e-5,
+                linesearch=True,
+            )
+            for j, idx in enumerate(chunk):
+                games[idx] = (
+                    payoff_tables[j],
+                    weights[j],
+                    [factor[j] for factor in factors],
+                )
+    return games
+
+
+def gen_cp_game(args):
+    """Draws a game from random CP factors instead of decomposing random tables.
+
+    The payoff tables are built from the sampled factors and normalized to
+    [min_val, max_val]. The scale of the normalization is folded into the
+    player factor and the weights are ones, as returned by parafac, since the
+    envs perturb the games through the factors alone. payoff_tables then equals
+    tl.cp_to_tensor((weights, factors)) up to the constant shift of
+    normalize_tables, which changes no equilibrium.
+    """
+    num_players, action_dims = gen_game_shape(args)
+
+    while True:
+        factors = [
+            np.random.randn(dim, args.action_size)
+            for dim in [num_players] + action_dims
+        ]
+        tables = tl.cp_to_tensor((np.ones(args.action_size), factors))
+        spread = np.max(tables) - np.min(tables)
+        if spread > 1e-8:
+            break
+
+    payoff_tables = normalize_tables(
+        tables=tables, max_val=args.max_val, min_val=args.min_val
+    )
+    factors[0] = factors[0] * (args.max_val - args.min_val) / spread
+    return payoff_tables, np.ones(args.action_size), factors
+
+
+def augment_game(game, args):
+    """Returns a random transform of a (payoff_tables, weights, factors) game.
+
+    Players and the actions of each player are randomly permuted. Around the
+    constant that the factorization leaves out, the payoffs of each player are
+    then scaled by a random factor in [args.augment_min_scale, 1] and negated
+    with probability args.augment_flip_prob, and the tables are normalized
+    again. The factors get the same permutations and scales, and the scale of
+    the normalization is folded into the player factor, which the envs perturb
+    the games with, so no decomposition is needed. As for gen_cp_game, the
+    factorization then holds up to the constant shift of normalize_tables.
+    """
+    payoff_tables, weights, factors = game[:3]
+    num_players = payoff_tables.shape[0]
+
+    # Player i of the new game is player players[i] of the original one
+    players = np.random.permutation(num_players)
+    payoff_tables = np.transpose(payoff_tables[players], [0] + list(players + 1))
+    factors = [factors[0][players]] + [factors[player + 1] for player in players]
+    for player in range(num_players):
+        actions = np.random.permutation(payoff_tables.shape[player + 1])
+        payoff_tables = np.take(payoff_tables, actions, axis=player + 1)
+        factors[player + 1] = factors[player + 1][actions]
+
+    # Scale around the constant left out of the factorization, so that it
+    # stays the same for every player
+    offset = np.mean(payoff_tables - tl.cp_to_tensor((weights, factors)))
+    scales = np.random.uniform(args.augment_min_scale, 1.0, size=num_players)
+    scales[np.random.random(num_players) < args.augment_flip_prob] *= -1.0
+    payoff_tables = offset + (payoff_tables - offset) * scales.reshape(
+        [-1] + [1] * num_players
+    )
+
+    spread = np.max(payoff_tables) - np.min(payoff_tables)
+    payoff_tables = normalize_tables(
+        tables=payoff_tables, max_val=args.max_val, min_val=args.min_val
+    )
+    scales = scales * (args.max_val - args.min_val) / spread
+    factors[0] = factors[0] * scales[:, None]
+    return payoff_tables, weights, factors
+
+
+def augment_game_dataset(game_dataset, args):
+    """Adds args.augment_number random transforms of each game to the dataset.
+
+    Precomputed game_stats are dropped from the transformed games, which
+    differ from the games they were computed on.
+    """
+    augmented_dataset = list(game_dataset)
+    for game in game_dataset:
+        for _ in range(args.augment_number):
+            augmented_dataset.append(augment_game(game, args))
+    return augmented_dataset
+
+
 def gen_response_graph(payoff_tables, args):
     m = args.m
     alpha = args.alpha
@@ -30,8 +30,10 @@ from solvers import (
     projected_replicator_dynamics,
     fictitious_play_strategy,
     ce_strategy,
-    # cce_strategy,
+    nash_strategy,
+    cce_strategy,
 )
+from solvers.cache import get_solver_cache
 from solvers.eval import nash_conv
 from utils import normalize_tables
 
@@ -44,6 +46,18 @@ class game_env(gym.Env):
         self.args = args
         self.game_dataset = game_dataset
         self.meta_solver = args.meta_solver
+        if self.meta_solver == "nash" and args.max_players > 2:
+            raise ValueError("The nash meta solver only supports two-player games")
+        self.alpharank_method = args.alpharank_method
+        # Previous step's meta-solver solution, used to warm-start the next solve
+        self.solver_state = None
+        # Iterations used by the last meta-solver call (None for alpha_rank)
+        self.solver_iterations = None
+        self.solver_cache = (
+            get_solver_cache(args.solver_cache_size)
+            if args.solver_cache_size > 0
+            else None
+        )
 
         self.original_game = None
         self.current_game = None
@@ -63,7 +77,7 @@ class game_env(gym.Env):
         self.eval_val = 0
         self.eval_abs_val = 0
 
-        payoff_tables, weights, factors = self.game_dataset[0]
+        payoff_tables, weights, factors = self.game_dataset[0][:3]
         self.observation_space = spaces.Box(
             low=args.min_val,
             high=args.max_val,
@@ -88,13 +102,23 @@ class game_env(gym.Env):
             idx = self.current_game_idx
             self.current_game_idx += 1
             self.current_game_idx %= len(self.game_dataset)
-        payoff_tables, weights, factors = self.game_dataset[idx]
+        payoff_tables, weights, factors = self.game_dataset[idx][:3]
+        # Optional results precomputed by precompute_game_stats()
+        game_stats = (
+            self.game_dataset[idx][3] if len(self.game_dataset[idx]) > 3 else {}
+        )
         self.original_game = deepcopy(payoff_tables)
         self.current_game = deepcopy(payoff_tables)
         # print(self.original_game)
         self.weights = weights
         self.factors = factors
-        init_nc = self._eval()
+        self.solver_state = None
+        init_solve = game_stats.get("init_solve", {}).get(self.meta_solver)
+        if init_solve is None:
+            init_nc = self._eval()
+        else:
+            init_nc, solver_state, self.solver_iterations = init_solve
+            self.solver_state = deepcopy(solver_state)
         self.pre_nc = init_nc
         self.min_nc = init_nc
         self.init_nc = init_nc
@@ -104,12 +128,18 @@ class game_env(gym.Env):
             # else:
             #     self.normalizer = init_nc
             self.normalizer = 1.0
+        elif self.meta_solver == "nash":
+            # An exact equilibrium of the original game has init_nc ~ 0
+            self.normalizer = 1.0
         else:
             self.normalizer = init_nc + 1e-6
         # obs = np.concatenate([deepcopy(self.original_game).flatten(), deepcopy(self.current_game).flatten()])
         # print(obs.shape)
         # print(deepcopy(self.original_game).flatten(),)
-        self.original_gnn_data = self.payoff_table_to_gnn(self.original_game)
+        if "gnn" in game_stats:
+            self.original_gnn_data = deepcopy(game_stats["gnn"])
+        else:
+            self.original_gnn_data = self.payoff_table_to_gnn(self.original_game)
         self.current_gnn_data = self.original_gnn_data
         return {
             "games": [deepcopy(self.original_game), deepcopy(self.current_game)],
@@ -119,20 +149,126 @@ class game_env(gym.Env):
             ],
         }
 
-    def _eval(self):
+    def _solver_budget(self, iterations):
+        """Iteration budget of the meta-solver, shrunk when it is warm-started."""
+        if self.solver_state is None:
+            return iterations
+        return max(1, int(iterations * self.args.warm_start_budget))
+
+    def _stopping_kwargs(self):
+        """Tolerance-based early stopping options of the iterative meta-solvers."""
+        return {
+            "tol": self.args.solver_tol,
+            "check_every": self.args.solver_check_every,
+            "convergence_metric": self.args.solver_convergence_metric,
+            "return_iterations": True,
+        }
+
+    def _solve(self):
+        """Runs the meta-solver on the current game, returning (res, state)."""
         if self.meta_solver == "alpha_rank":
-            res = alpharank_strategy(self.current_game, return_joint=False)
+            min_iters = self._solver_budget(10)
+            res, epsilon = alpharank_strategy(
+                self.current_game,
+                return_joint=False,
+                method=self.alpharank_method,
+                warm_start_epsilon=self.solver_state,
+                min_iters=min_iters,
+                return_epsilon=True,
+            )
+            # The sweep halves epsilon at least min_iters + 1 times, so restart
+            # the next one that far above the final epsilon instead of letting
+            # epsilon shrink from step to step
+            state = None
+            if epsilon is not None:
+                state = min(0.5, epsilon * 2.0 ** (min_iters + 1))
+            self.solver_iterations = None
         elif self.meta_solver == "fp":
-            res = fictitious_play_strategy(self.current_game, max_iterations=int(5e3))
+            # The previous solution counts for the plays it was averaged over
+            res, self.solver_iterations = fictitious_play_strategy(
+                self.current_game,
+                max_iterations=self._solver_budget(self.args.fp_iterations),
+                initial_strategies=self.solver_state,
+                initial_weight=self.solver_iterations or 1,
+                **self._stopping_kwargs()
+            )
+            state = res
         elif self.meta_solver == "ce":
-            res = ce_strategy(self.current_game, iterations=int(5e3))
-        # elif self.meta_solver == "cce":
-        #     res = cce_strategy(self.current_game)
+            # Regret matching resumes from the previous strategies and regrets
+            initial_strategies, initial_regrets = self.solver_state or (None, None)
+            res, regrets, self.solver_iterations = ce_strategy(
+                self.current_game,
+                iterations=self._solver_budget(self.args.ce_iterations),
+                initial_strategies=initial_strategies,
+                initial_regrets=initial_regrets,
+                return_regrets=True,
+                method=self.args.ce_method,
+                **self._stopping_kwargs()
+            )
+            state = None if regrets is None else (res, regrets)
+        elif self.meta_solver == "nash":
+            res = nash_strategy(self.current_game)
+            state = None
+            self.solver_iterations = None
+        elif self.meta_solver == "cce":
+            res = cce_strategy(self.current_game)
+            state = None
+            self.solver_iterations = None
         else:
-            res = projected_replicator_dynamics(
-                payoff_tensors=self.current_game, prd_iterations=int(5e3)
+            res, self.solver_iterations = projected_replicator_dynamics(
+                payoff_tensors=self.current_game,
+                prd_initial_strategies=self.solver_state,
+                prd_iterations=self._solver_budget(
+                    self.args.prd_iterations or int(5e3)
+                ),
+                **self._stopping_kwargs()
             )
-        return sum(nash_conv(self.original_game, res))
+            state = list(res)
+        return res, state
+
+    def _solver_params(self):
+        """Everything besides the current game that the result of _eval depends on."""
+        args = self.args
+        return {
+            "eval_game": self.original_game,
+            "solver_state": self.solver_state,
+            "alpharank_method": self.alpharank_method,
+            "ce_method": args.ce_method,
+            "warm_start_budget": args.warm_start_budget,
+            "prd_iterations": args.prd_iterations,
+            "ce_iterations": args.ce_iterations,
+            "fp_iterations": args.fp_iterations,
+            "solver_tol": args.solver_tol,
+            "solver_check_every": args.solver_check_every,
+            "solver_convergence_metric": args.solver_convergence_metric,
+        }
+
+    def _eval(self):
+        cache_key = None
+        if self.solver_cache is not None:
+            cache_key = self.solver_cache.key(
+                self.current_game, self.meta_solver, self._solver_params()
+            )
+            entry = self.solver_cache.get(cache_key)
+            if entry is not None:
+                self.solver_iterations = entry["solver_iterations"]
+                if self.args.warm_start_solver:
+                    self.solver_state = entry["solver_state"]
+                return entry["nash_conv"]
+
+        res, state = self._solve()
+        if self.args.warm_start_solver:
+            self.solver_state = state
+        nc = sum(nash_conv(self.original_game, res))
+        if cache_key is not None:
+            self.solver_cache.put(
+                cache_key,
+                res,
+                nc,
+                solver_state=state,
+                solver_iterations=self.solver_iterations,
+            )
+        return nc
 
     def step(self, action):
         args = self.args
@@ -158,7 +294,7 @@ class game_env(gym.Env):
         # print("reward: {}".format(reward))
         self.pre_nc = current_nc
 
-        info = {}
+        info = {"solver_iterations": self.solver_iterations}
         if done:
             episode_min = (self.init_nc - self.min_nc) / self.normalizer
             episode_abs_min = self.init_nc - self.min_nc
@@ -196,6 +332,47 @@ class game_env(gym.Env):
         pass
 
 
+def precompute_game_stats(game_dataset, args, meta_solvers=None):
+    """Stores the results of solving each original game with the dataset.
+
+    The initial exploitability, warm-start state and iteration count of each
+    meta-solver, and the original game's GNN graph, only depend on the dataset
+    entry. Resets look them up instead of recomputing them.
+
+    Args:
+      game_dataset: list of (payoff_tables, weights, factors[, game_stats]).
+      args: the game arguments the environments are created with.
+      meta_solvers: meta-solvers to precompute, defaults to args.meta_solver.
+
+    Returns:
+      The list of (payoff_tables, weights, factors, game_stats) entries, where
+      game_stats maps "init_solve" to {meta_solver: (init_nc, solver_state,
+      solver_iterations)} and "gnn" to the original game's GNN graph.
+    """
+    meta_solvers = meta_solvers or [args.meta_solver]
+    env = game_env(game_dataset=game_dataset, args=args, is_train=False)
+    stats_dataset = []
+    for entry in game_dataset:
+        payoff_tables, weights, factors = entry[:3]
+        game_stats = dict(entry[3]) if len(entry) > 3 else {}
+        init_solve = dict(game_stats.get("init_solve", {}))
+        for meta_solver in meta_solvers:
+            if meta_solver in init_solve:
+                # Already precomputed, e.g. loaded from the dataset cache
+                continue
+            env.meta_solver = meta_solver
+            env.original_game = deepcopy(payoff_tables)
+            env.current_game = deepcopy(payoff_tables)
+            env.solver_state = None
+            init_nc = env._eval()
+            init_solve[meta_solver] = (init_nc, env.solver_state, env.solver_iterations)
+        game_stats["init_solve"] = init_solve
+        if "gnn" not in game_stats:
+            game_stats["gnn"] = env.payoff_table_to_gnn(payoff_tables)
+        stats_dataset.append((payoff_tables, weights, factors, game_stats))
+    return stats_dataset
+
+
 def make_env(game_dataset, args, is_train=True):
     def _thunk():
         env = game_env(game_dataset=game_dataset, args=args, is_train=is_train)
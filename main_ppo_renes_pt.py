@@ -11,9 +11,10 @@ from a2c_ppo_acktr import algo
 # from a2c_ppo_acktr.algo import gail
 from a2c_ppo_acktr.arguments import get_args
 from game_envs.envs import make_vec_envs as game_make_vec_envs
+from game_envs.envs import precompute_game_stats
 from a2c_ppo_acktr.model import Policy
 from a2c_ppo_acktr.storage import RolloutStorage
-from game2graph.game_data import gen_game_datasets
+from game2graph.game_data import cache_game_stats, gen_game_datasets
 from configs import get_parser
 
 # import numpy as np
@@ -186,6 +187,12 @@ def main():
     device = torch.device("cuda:0" if args.cuda else "cpu")
 
     train_dataset, test_dataset = gen_game_datasets(game_args)
+    if game_args.precompute_game_stats in ["test", "all"]:
+        test_dataset = precompute_game_stats(test_dataset, game_args)
+    if game_args.precompute_game_stats == "all":
+        train_dataset = precompute_game_stats(train_dataset, game_args)
+    if game_args.precompute_game_stats in ["test", "all"]:
+        cache_game_stats(game_args, train_dataset, test_dataset)
     # test_dataset = train_dataset
     is_game = True
     if is_game:
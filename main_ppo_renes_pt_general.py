@@ -11,9 +11,10 @@ from a2c_ppo_acktr.algo.ppo_general import PPO
 # from a2c_ppo_acktr.algo import gail
 from a2c_ppo_acktr.arguments import get_args
 from game_envs.envs_general import make_vec_envs as game_make_vec_envs
+from game_envs.envs_general import precompute_game_stats
 from a2c_ppo_acktr.model import Policy
 from a2c_ppo_acktr.storage_general import RolloutStorage
-from game2graph.game_data import gen_game_datasets
+from game2graph.game_data import cache_game_stats, gen_game_datasets
 from configs import get_parser
 from copy import deepcopy
 
@@ -199,6 +200,12 @@ def main():
     csv_writer.writerow(csv_header)
 
     train_dataset, test_dataset = gen_game_datasets(game_args)
+    if game_args.precompute_game_stats in ["test", "all"]:
+        test_dataset = precompute_game_stats(test_dataset, game_args)
+    if game_args.precompute_game_stats == "all":
+        train_dataset = precompute_game_stats(train_dataset, game_args)
+    if game_args.precompute_game_stats in ["test", "all"]:
+        cache_game_stats(game_args, train_dataset, test_dataset)
     # print(train_dataset[0])
     # test_dataset = train_dataset
     envs = game_make_vec_envs(
@@ -1,7 +1,11 @@
-from solvers.alpha_rank import alpharank_strategy
-from solvers.prd_solver import projected_replicator_dynamics
+from solvers.alpha_rank import alpharank_strategy, alpharank_strategy_batch
+from solvers.prd_solver import (
+    projected_replicator_dynamics,
+    projected_replicator_dynamics_batch,
+)
 from solvers.fp_solvers import fictitious_play_strategy
-from solvers.ce_solvers import ce_strategy
+from solvers.ce_solvers import ce_strategy, cce_strategy
+from solvers.nash_solvers import nash_strategy
+from solvers.cache import SolverCache, get_solver_cache
 
-# from solvers.ce_solvers import _mwcce as cce_strategy
 # from solvers.ce_solvers import _mwce as ce_strategy
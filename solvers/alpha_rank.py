@@ -24,10 +24,22 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import warnings
+
 import numpy as np
 import open_spiel.python.egt.alpharank_visualizer as alpharank_visualizer
 import open_spiel.python.egt.utils as utils
 import scipy.linalg as la
+import scipy.sparse as sp
+import scipy.sparse.csgraph as csgraph
+import scipy.sparse.linalg as spla
+import scipy.special as special
+
+# Above this number of strategy profiles, "auto" uses the sparse stationary solver
+SPARSE_NUM_PROFILES_THRESHOLD = 100
+# Smallest number of profiles for which the sparse solver is warm-started with
+# GMRES, below it the direct solve is faster
+ITERATIVE_NUM_PROFILES_THRESHOLD = 500
 
 
 def _get_payoff(payoff_table_k, payoffs_are_hpt_format, strat_profile, k=None):
@@ -198,6 +210,69 @@ def _get_rho_sr(
     return result
 
 
+def _get_rho_singlepop_vectorized(
+    payoff_table,
+    m,
+    alpha,
+    game_is_constant_sum,
+    use_local_selection_model,
+    payoff_sum=None,
+):
+    """Vectorized version of _get_rho_sr() for all strategy pairs at once.
+    Only applicable to numpy payoff tables. In the general (non-constant-sum,
+    global selection) case, the fitness differences of every population split
+    p_r = 1, ..., m - 1 are computed as one [s, r, p_r] array, and the series
+    sum_l prod_{p_r <= l} exp(-alpha * (f_r - f_s)) is evaluated in log-space
+    with a cumulative sum and a log-sum-exp.
+    Args:
+      payoff_table: A numpy payoff table.
+      m: The total number of agents in the population.
+      alpha: Fermi distribution temperature parameter.
+      game_is_constant_sum: Boolean indicating if the game is constant sum.
+      use_local_selection_model: Enable local evolutionary selection model, which
+        considers fitness against the current opponent only, rather than the
+        global population state.
+      payoff_sum: The payoff sum if the game is constant sum, or None otherwise.
+    Returns:
+      rhos: Matrix whose [s, r] entry is the fixation probability of rogue
+        strategy r in population playing s (zero on the diagonal).
+    """
+    payoff_table = np.asarray(payoff_table, dtype=float)
+    # payoff_rs[s, r] is the payoff of r when played against s
+    payoff_rs = payoff_table.T
+
+    if use_local_selection_model or game_is_constant_sum:
+        if use_local_selection_model:
+            u = alpha * (payoff_rs - payoff_table)
+        else:
+            assert payoff_sum is not None
+            u = alpha * m / (m - 1) * (payoff_rs - payoff_sum / 2)
+        # To avoid divide by 0, use first-order approximation when u is near 0
+        near_zero = np.isclose(u, 0, atol=1e-14)
+        u_safe = np.where(near_zero, 1.0, u)
+        rhos = np.where(
+            near_zero, 1 / m, (1 - np.exp(-u_safe)) / (1 - np.exp(-m * u_safe))
+        )
+    else:
+        assert payoff_sum is None
+        p_r = np.arange(1, m)
+        self_payoffs = np.diag(payoff_table)
+        # Fitness of agent playing r against rest of current population
+        f_ri = ((p_r - 1) / (m - 1)) * self_payoffs[None, :, None] + (
+            (m - p_r) / (m - 1)
+        ) * payoff_rs[:, :, None]
+        # Fitness of agent playing s against rest of current population
+        f_sj = ((m - p_r - 1) / (m - 1)) * self_payoffs[:, None, None] + (
+            p_r / (m - 1)
+        ) * payoff_table[:, :, None]
+        log_t_mult = -alpha * np.cumsum(f_ri - f_sj, axis=2)
+        # (1 + summed) ** (-1), with summed = sum(exp(log_t_mult))
+        rhos = special.expit(-special.logsumexp(log_t_mult, axis=2))
+
+    rhos[np.diag_indices(len(rhos))] = 0
+    return rhos
+
+
 def _get_rho_sr_multipop(
     payoff_table_k, payoffs_are_hpt_format, k, m, r, s, alpha, use_fast_compute=True
 ):
@@ -286,6 +361,19 @@ def _get_singlepop_transition_matrix(
     )
     num_strats = num_strats_per_population[0]
 
+    if not payoffs_are_hpt_format and not use_inf_alpha:
+        rhos = _get_rho_singlepop_vectorized(
+            payoff_table,
+            m,
+            alpha,
+            game_is_constant_sum,
+            use_local_selection_model,
+            payoff_sum,
+        )
+        c = rhos / (num_strats - 1)
+        c[np.diag_indices(num_strats)] = 1 - np.sum(c, axis=1)  # Diagonals
+        return c, rhos
+
     c = np.zeros((num_strats, num_strats))
     rhos = np.zeros((num_strats, num_strats))
 
@@ -351,6 +439,160 @@ def get_multipop_transition_matrix(
     )
 
 
+def _get_multipop_deviation_ids(num_strats_per_population):
+    """Enumerates all unilateral profile deviations of a multipopulation game.
+    Profiles are indexed as in utils.get_id_from_strat_profile(), which is the
+    row-major (C order) flattening of the payoff tensor, so a deviation of
+    population k from strategy s[k] to r[k] moves the profile id by
+    (r[k] - s[k]) * stride_k.
+    Args:
+      num_strats_per_population: Number of strategies of each population.
+    Returns:
+      population_ids: Index of the population that deviates.
+      row_ids: Ids of the current profiles s.
+      col_ids: Ids of the mutant profiles r.
+    """
+    shape = tuple(int(n) for n in num_strats_per_population)
+    num_profiles = int(np.prod(shape))
+    profile_ids = np.arange(num_profiles)
+    profiles = np.unravel_index(profile_ids, shape)
+
+    population_ids, row_ids, col_ids = [], [], []
+    for k, num_strats in enumerate(shape):
+        stride = int(np.prod(shape[k + 1 :]))
+        new_strats = np.arange(num_strats)
+        # [num_profiles, num_strats] ids of every profile reachable by population k
+        next_ids = (
+            profile_ids[:, None] + (new_strats[None, :] - profiles[k][:, None]) * stride
+        )
+        mask = new_strats[None, :] != profiles[k][:, None]
+        rows = np.broadcast_to(profile_ids[:, None], next_ids.shape)[mask]
+        population_ids.append(np.full(len(rows), k))
+        row_ids.append(rows)
+        col_ids.append(next_ids[mask])
+
+    return (
+        np.concatenate(population_ids),
+        np.concatenate(row_ids),
+        np.concatenate(col_ids),
+    )
+
+
+def _get_multipop_profile_transitions(payoff_tables, num_strats_per_population):
+    """Gathers the payoffs of every unilateral deviation of a multipopulation game.
+    Only applicable to numpy payoff tables.
+    Args:
+      payoff_tables: List of numpy payoff tables, one per population.
+      num_strats_per_population: Number of strategies of each population.
+    Returns:
+      row_ids: Ids of the current profiles s.
+      col_ids: Ids of the mutant profiles r.
+      payoff_row: Payoff of the deviating population in profile s.
+      payoff_col: Payoff of the deviating population in profile r.
+    """
+    population_ids, row_ids, col_ids = _get_multipop_deviation_ids(
+        num_strats_per_population
+    )
+    payoffs = np.reshape(payoff_tables, (len(payoff_tables), -1))
+    return (
+        row_ids,
+        col_ids,
+        payoffs[population_ids, row_ids],
+        payoffs[population_ids, col_ids],
+    )
+
+
+def _get_payoff_comparisons(payoff_row, payoff_col):
+    """Classifies each deviation as a payoff tie or a strict improvement."""
+    is_tie = np.isclose(payoff_col, payoff_row, atol=1e-14)
+    is_better = payoff_col > payoff_row
+    return is_tie, is_better
+
+
+def _get_inf_alpha_transition_weights(is_tie, is_better, inf_alpha_eps):
+    """Vectorized infinite-alpha transition weights (before scaling by eta)."""
+    return np.where(is_tie, 0.5, np.where(is_better, 1 - inf_alpha_eps, inf_alpha_eps))
+
+
+def _get_rho_multipop_vectorized(f_r, f_s, m, alpha):
+    """Vectorized closed-form version of _get_rho_sr_multipop()."""
+    u = alpha * (f_r - f_s)
+    # To avoid divide by 0, use first-order approximation when u is near 0
+    near_zero = np.isclose(u, 0, atol=1e-3)
+    u_safe = np.where(near_zero, 1.0, u)
+    return np.where(near_zero, 1 / m, (1 - np.exp(-u_safe)) / (1 - np.exp(-m * u_safe)))
+
+
+def _assemble_transition_matrix(
+    row_ids, col_ids, c_vals, num_profiles, use_sparse=False
+):
+    """Builds c from its off-diagonal entries and adds the self-transitions."""
+    if use_sparse:
+        diag_ids = np.arange(num_profiles)
+        diag_vals = 1 - np.bincount(row_ids, weights=c_vals, minlength=num_profiles)
+        return sp.csr_matrix(
+            (
+                np.concatenate([c_vals, diag_vals]),
+                (
+                    np.concatenate([row_ids, diag_ids]),
+                    np.concatenate([col_ids, diag_ids]),
+                ),
+            ),
+            shape=(num_profiles, num_profiles),
+        )
+
+    c = np.zeros((num_profiles, num_profiles))
+    c[row_ids, col_ids] = c_vals
+    c[np.diag_indices(num_profiles)] = 1 - np.sum(c, axis=1)
+    return c
+
+
+def _get_multipop_transition_matrix_vectorized(
+    payoff_tables,
+    num_strats_per_population,
+    m,
+    alpha,
+    use_inf_alpha=False,
+    inf_alpha_eps=0.1,
+    use_sparse=False,
+):
+    """Array-based equivalent of _get_multipop_transition_matrix().
+    With use_sparse, c and rhos are built directly as CSR matrices, since each
+    row of c only has sum(a_k - 1) + 1 non-zeros.
+    """
+    num_profiles = int(utils.get_num_profiles(num_strats_per_population))
+    eta = 1.0 / (np.sum(num_strats_per_population - 1))
+
+    row_ids, col_ids, payoff_row, payoff_col = _get_multipop_profile_transitions(
+        payoff_tables, num_strats_per_population
+    )
+    if use_inf_alpha:
+        is_tie, is_better = _get_payoff_comparisons(payoff_row, payoff_col)
+        c_vals = eta * _get_inf_alpha_transition_weights(
+            is_tie, is_better, inf_alpha_eps
+        )
+        rho_vals = None
+    else:
+        rho_vals = _get_rho_multipop_vectorized(payoff_col, payoff_row, m, alpha)
+        c_vals = eta * rho_vals
+
+    if use_sparse:
+        rhos = sp.csr_matrix((num_profiles, num_profiles))
+        if rho_vals is not None:
+            rhos = sp.csr_matrix(
+                (rho_vals, (row_ids, col_ids)), shape=(num_profiles, num_profiles)
+            )
+    else:
+        rhos = np.zeros((num_profiles, num_profiles))
+        if rho_vals is not None:
+            rhos[row_ids, col_ids] = rho_vals
+    c = _assemble_transition_matrix(
+        row_ids, col_ids, c_vals, num_profiles, use_sparse=use_sparse
+    )
+
+    return c, rhos
+
+
 def _get_multipop_transition_matrix(
     payoff_tables,
     payoffs_are_hpt_format,
@@ -358,12 +600,27 @@ def _get_multipop_transition_matrix(
     alpha,
     use_inf_alpha=False,
     inf_alpha_eps=0.1,
+    use_sparse=False,
 ):
-    """Gets Markov transition matrix for multipopulation games."""
+    """Gets Markov transition matrix for multipopulation games.
+    If use_sparse is set (and payoffs are numpy arrays), c and rhos are returned
+    as scipy.sparse CSR matrices.
+    """
 
     num_strats_per_population = utils.get_num_strats_per_population(
         payoff_tables, payoffs_are_hpt_format
     )
+    if not payoffs_are_hpt_format:
+        return _get_multipop_transition_matrix_vectorized(
+            payoff_tables,
+            num_strats_per_population,
+            m,
+            alpha,
+            use_inf_alpha=use_inf_alpha,
+            inf_alpha_eps=inf_alpha_eps,
+            use_sparse=use_sparse,
+        )
+
     num_profiles = utils.get_num_profiles(num_strats_per_population)
 
     eta = 1.0 / (np.sum(num_strats_per_population - 1))
@@ -445,6 +702,49 @@ def _get_stationary_distr(c):
     return left_eigenvecs.real.flatten()
 
 
+def _get_stationary_distr_sparse(c, pi_init=None):
+    """Gets stationary distribution of (sparse) transition matrix c.
+    Solves pi (c - I) = 0 with one balance equation replaced by sum(pi) = 1. This
+    system is non-singular iff the chain has a unique stationary distribution.
+    For large chains, pi_init (e.g. the distribution of the previous epsilon of a
+    sweep) warm-starts GMRES, and the direct solve is only used if it fails.
+    """
+
+    c = sp.csr_matrix(c)
+    num_profiles = c.shape[0]
+    a = (c.T - sp.identity(num_profiles, format="csr")).tocsr()
+    a = sp.vstack([a[:-1], sp.csr_matrix(np.ones((1, num_profiles)))], format="csc")
+    b = np.zeros(num_profiles)
+    b[-1] = 1.0
+
+    if pi_init is not None and num_profiles >= ITERATIVE_NUM_PROFILES_THRESHOLD:
+        pi, info = spla.gmres(
+            a.tocsr(), b, x0=pi_init, rtol=1e-12, atol=0.0, restart=50, maxiter=4
+        )
+        if info == 0 and np.all(np.isfinite(pi)):
+            return pi
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", spla.MatrixRankWarning)
+        try:
+            pi = spla.spsolve(a, b)
+        except spla.MatrixRankWarning:
+            pi = None
+    if pi is None or not np.all(np.isfinite(pi)):
+        raise ValueError("Expected 1 stationary distribution, but c is reducible")
+
+    return pi
+
+
+def _use_sparse_stationary_solver(stationary_solver, num_profiles):
+    """Resolves the stationary_solver option of compute()."""
+    if stationary_solver == "auto":
+        return num_profiles > SPARSE_NUM_PROFILES_THRESHOLD
+    if stationary_solver not in ("dense", "sparse"):
+        raise ValueError("Unknown stationary_solver: {}".format(stationary_solver))
+    return stationary_solver == "sparse"
+
+
 def print_results(
     payoff_tables, payoffs_are_hpt_format, rhos=None, rho_m=None, c=None, pi=None
 ):
@@ -464,6 +764,8 @@ def print_results(
             np.around(rhos / rho_m, decimals=2),
         )
     if c is not None:
+        if sp.issparse(c):
+            c = c.toarray()
         print("\nMarkov transition matrix (c):\n", np.around(c, decimals=2))
     if pi is not None:
         print("\nStationary distribution (pi):\n", pi)
@@ -480,6 +782,7 @@ def sweep_pi_vs_epsilon(
     min_epsilon=1e-14,
     num_strats_to_label=10,
     legend_sort_clusters=False,
+    stationary_solver="auto",
 ):
     """Computes infinite-alpha distribution for a range of perturbations.
     The range of response graph perturbations is defined in epsilon_list.
@@ -507,6 +810,10 @@ def sweep_pi_vs_epsilon(
         the legend according to orderings for earlier alpha values. Primarily for
         visualization purposes! Rankings for lower alpha values should be
         interpreted carefully.
+      stationary_solver: Stationary distribution solver, see compute(). For
+        multipopulation games the transition structure is computed once and
+        only re-weighted for each epsilon, and sparse solves are warm-started
+        from the previous epsilon's pi.
     Returns:
      pi: AlphaRank stationary distribution.
      epsilon: The AlphaRank transition matrix noise level resulting from sweep.
@@ -542,22 +849,51 @@ def sweep_pi_vs_epsilon(
     else:
         epsilon = 0.5
 
-    rhos_list, rhom_list, c_list = {}, {}, {}
+    # Only the matrices of the last successful (i.e., smallest) epsilon are kept
+    rhos, rhom, c = None, None, None
+    reweight_transitions = num_populations > 1 and not payoffs_are_hpt_format
+    if reweight_transitions:
+        # In the infinite-alpha model epsilon only re-weights the transitions, so
+        # the payoff comparisons are computed once for the whole sweep
+        row_ids, col_ids, payoff_row, payoff_col = _get_multipop_profile_transitions(
+            payoff_tables, num_strats_per_population
+        )
+        is_tie, is_better = _get_payoff_comparisons(payoff_row, payoff_col)
+        eta = 1.0 / (np.sum(num_strats_per_population - 1))
+        use_sparse = _use_sparse_stationary_solver(stationary_solver, num_profiles)
+        if use_sparse:
+            rhos = sp.csr_matrix((num_profiles, num_profiles))
+        else:
+            rhos = np.zeros((num_profiles, num_profiles))
+        rhom = 1
+
     while True:
         try:
             pi_prev = pi
-            rhos, rhom, c, pi, _, _ = compute(
-                payoff_tables,
-                m=m,
-                alpha=alpha,
-                use_inf_alpha=True,
-                inf_alpha_eps=epsilon,
-            )
+            if reweight_transitions:
+                c_epsilon = _assemble_transition_matrix(
+                    row_ids,
+                    col_ids,
+                    eta * _get_inf_alpha_transition_weights(is_tie, is_better, epsilon),
+                    num_profiles,
+                    use_sparse=use_sparse,
+                )
+                if use_sparse:
+                    pi = _get_stationary_distr_sparse(c_epsilon, pi_init=pi_prev)
+                else:
+                    pi = _get_stationary_distr(c_epsilon)
+                c = c_epsilon
+            else:
+                rhos, rhom, c, pi, _, _ = compute(
+                    payoff_tables,
+                    m=m,
+                    alpha=alpha,
+                    use_inf_alpha=True,
+                    inf_alpha_eps=epsilon,
+                    stationary_solver=stationary_solver,
+                )
             # print(rhos)
             epsilon_pi_hist[epsilon] = pi
-            rhos_list[epsilon] = rhos
-            rhom_list[epsilon] = rhom
-            c_list[epsilon] = c
             # Stop when pi converges
             if num_iters > min_iters and np.allclose(pi, pi_prev):
                 break
@@ -615,20 +951,9 @@ def sweep_pi_vs_epsilon(
         )
 
     if return_epsilon:
-        return (
-            pi_list[-1],
-            epsilon_list[-1],
-            rhos_list[epsilon_list[-1]],
-            rhom_list[epsilon_list[-1]],
-            c_list[epsilon_list[-1]],
-        )
+        return pi_list[-1], epsilon_list[-1], rhos, rhom, c
     else:
-        return (
-            pi_list[-1],
-            rhos_list[epsilon_list[-1]],
-            rhom_list[epsilon_list[-1]],
-            c_list[epsilon_list[-1]],
-        )
+        return pi_list[-1], rhos, rhom, c
 
 
 def sweep_pi_vs_alpha(
@@ -794,6 +1119,7 @@ def compute(
     verbose=False,
     use_inf_alpha=False,
     inf_alpha_eps=0.01,
+    stationary_solver="auto",
 ):
     """Computes the finite population stationary statistics.
     Args:
@@ -808,6 +1134,10 @@ def compute(
       verbose: Set to True to print intermediate results_109.
       use_inf_alpha: Use infinite-alpha alpharank model.
       inf_alpha_eps: Noise term to use in infinite-alpha alpharank model.
+      stationary_solver: "dense" for a full eigendecomposition of c, "sparse"
+        to build c (and rhos) as CSR matrices and solve a sparse linear system,
+        or "auto" to use the sparse path above SPARSE_NUM_PROFILES_THRESHOLD
+        strategy profiles.
     Returns:
       rhos: Matrix of strategy-to-strategy fixation probabilities.
       rho_m: Neutral fixation probability.
@@ -861,7 +1191,10 @@ def compute(
             inf_alpha_eps=inf_alpha_eps,
         )
         num_profiles = num_strats_per_population[0]
+        use_sparse = _use_sparse_stationary_solver(stationary_solver, num_profiles)
     else:
+        num_profiles = utils.get_num_profiles(num_strats_per_population)
+        use_sparse = _use_sparse_stationary_solver(stationary_solver, num_profiles)
         c, rhos = _get_multipop_transition_matrix(
             payoff_tables,
             payoffs_are_hpt_format,
@@ -869,10 +1202,13 @@ def compute(
             alpha,
             use_inf_alpha=use_inf_alpha,
             inf_alpha_eps=inf_alpha_eps,
+            use_sparse=use_sparse,
         )
-        num_profiles = utils.get_num_profiles(num_strats_per_population)
 
-    pi = _get_stationary_distr(c)
+    if use_sparse:
+        pi = _get_stationary_distr_sparse(c)
+    else:
+        pi = _get_stationary_distr(c)
 
     rho_m = 1.0 / m if not use_inf_alpha else 1  # Neutral fixation probability
     if verbose:
@@ -912,6 +1248,16 @@ def suggest_alpha(payoff_tables, tol=0.1):
     num_profiles = utils.get_num_profiles(num_strats_per_population)
 
     gap = np.inf
+    if not payoffs_are_hpt_format:
+        _, _, payoff_row, payoff_col = _get_multipop_profile_transitions(
+            payoff_tables, num_strats_per_population
+        )
+        payoff_gaps = payoff_col - payoff_row
+        payoff_gaps = payoff_gaps[payoff_gaps > 0]
+        if len(payoff_gaps) > 0:  # pylint: disable=g-explicit-length-test
+            gap = np.min(payoff_gaps)
+        return -np.log(tol) / gap
+
     for id_row_profile in range(num_profiles):
         row_profile = utils.get_strat_profile_from_id(
             num_strats_per_population, id_row_profile
@@ -978,39 +1324,284 @@ def get_alpharank_marginals(payoff_tables, pi):
         num_strats_per_population = utils.get_num_strats_per_population(
             payoff_tables, payoffs_are_hpt_format=False
         )
-        num_profiles = utils.get_num_profiles(num_strats_per_population)
-        pi_marginals = [np.zeros(n) for n in num_strats_per_population]
-        for i_strat in range(num_profiles):
-            strat_profile = utils.get_strat_profile_from_id(
-                num_strats_per_population, i_strat
-            )
-            for i_player in range(num_populations):
-                pi_marginals[i_player][strat_profile[i_player]] += pi[i_strat]
+        # Profile ids are the row-major flattening of the joint strategy tensor
+        pi = np.reshape(pi, num_strats_per_population)
+        pi_marginals = [
+            np.sum(pi, axis=tuple(j for j in range(num_populations) if j != i_player))
+            for i_player in range(num_populations)
+        ]
         return pi_marginals
 
 
-def alpharank_strategy(meta_game, return_joint=False, **unused_kwargs):
+def get_inf_alpha_sink_scc_distr(payoff_tables):
+    """Computes the exact infinite-alpha distribution from the response graph.
+    As epsilon -> 0, the infinite-alpha chain only keeps the transitions to
+    strictly better (weight eta) or equally good (weight eta / 2) profiles, and
+    all stationary mass ends up on the sink strongly connected components of this
+    response graph. With a single sink component, the limit distribution is the
+    stationary distribution of the chain restricted to that component. With
+    several sink components, the split of the mass between them depends on the
+    epsilon-perturbations, so None is returned and callers should fall back to
+    sweep_pi_vs_epsilon().
+    Args:
+      payoff_tables: List of numpy payoff tables of a multipopulation game.
+    Returns:
+      pi: The stationary distribution over all strategy profiles, or None.
+    """
+    num_strats_per_population = utils.get_num_strats_per_population(
+        payoff_tables, payoffs_are_hpt_format=False
+    )
+    num_profiles = int(utils.get_num_profiles(num_strats_per_population))
+    eta = 1.0 / (np.sum(num_strats_per_population - 1))
+
+    row_ids, col_ids, payoff_row, payoff_col = _get_multipop_profile_transitions(
+        payoff_tables, num_strats_per_population
+    )
+    is_tie, is_better = _get_payoff_comparisons(payoff_row, payoff_col)
+    edges = is_tie | is_better
+    row_ids, col_ids, is_tie = row_ids[edges], col_ids[edges], is_tie[edges]
+
+    response_graph = sp.csr_matrix(
+        (np.ones(len(row_ids)), (row_ids, col_ids)),
+        shape=(num_profiles, num_profiles),
+    )
+    num_components, labels = csgraph.connected_components(
+        response_graph, directed=True, connection="strong"
+    )
+    is_sink = np.ones(num_components, dtype=bool)
+    is_sink[labels[row_ids][labels[row_ids] != labels[col_ids]]] = False
+    sink_components = np.flatnonzero(is_sink)
+    if len(sink_components) != 1:
+        return None
+
+    members = np.flatnonzero(labels == sink_components[0])
+    pi = np.zeros(num_profiles)
+    if len(members) == 1:
+        pi[members] = 1.0
+        return pi
+
+    # No response-graph edge leaves a sink component, so the restricted chain
+    # is closed and irreducible
+    local_ids = np.full(num_profiles, -1)
+    local_ids[members] = np.arange(len(members))
+    inside = labels[row_ids] == sink_components[0]
+    use_sparse = len(members) > SPARSE_NUM_PROFILES_THRESHOLD
+    c = _assemble_transition_matrix(
+        local_ids[row_ids[inside]],
+        local_ids[col_ids[inside]],
+        eta * np.where(is_tie[inside], 0.5, 1.0),
+        len(members),
+        use_sparse=use_sparse,
+    )
+    if use_sparse:
+        pi[members] = _get_stationary_distr_sparse(c)
+    else:
+        pi[members] = _get_stationary_distr(c)
+    return pi
+
+
+def alpharank_strategy(
+    meta_game,
+    return_joint=False,
+    stationary_solver="auto",
+    method="sweep",
+    warm_start_epsilon=None,
+    min_iters=10,
+    return_epsilon=False,
+    **unused_kwargs
+):
     """Returns AlphaRank distribution on meta game matrix.
     This method works for general games.
     Args:
       solver: GenPSROSolver instance.
       return_joint: a boolean specifying whether to return player-wise
         marginals.
+      stationary_solver: "dense", "sparse" or "auto", see compute().
+      method: "sweep" to approach infinite alpha with sweep_pi_vs_epsilon(), or
+        "sink_scc" to use the exact response-graph solution of
+        get_inf_alpha_sink_scc_distr() when it applies (multipopulation games
+        with a single sink component), falling back to the sweep otherwise.
+      warm_start_epsilon: Initial epsilon of the sweep, e.g. the final epsilon
+        of a previous solve of a similar game.
+      min_iters: the minimum number of sweep iterations.
+      return_epsilon: Whether to also return the final epsilon of the sweep
+        (None if the exact sink-SCC solution was used).
     Returns:
       marginals: a list, specifying for each player the alpharank marginal
         distributions on their strategies.
       joint_distr: a list, specifying the joint alpharank distributions for all
         strategy profiles.
+      epsilon: The final epsilon of the sweep.
     """
+    if method not in ("sweep", "sink_scc"):
+        raise ValueError("Unknown alpharank method: {}".format(method))
     meta_games = meta_game
     meta_games = [np.asarray(x) for x in meta_games]
-    joint_distr, _, _, _ = sweep_pi_vs_epsilon(meta_games)
+    joint_distr, epsilon = None, None
+    if method == "sink_scc" and len(meta_games) > 1:
+        joint_distr = get_inf_alpha_sink_scc_distr(meta_games)
+    if joint_distr is None:
+        joint_distr, epsilon, _, _, _ = sweep_pi_vs_epsilon(
+            meta_games,
+            warm_start_epsilon=warm_start_epsilon,
+            return_epsilon=True,
+            min_iters=min_iters,
+            stationary_solver=stationary_solver,
+        )
     # print(joint_distr)
     # if len(joint_distr[joint_distr < 0]) > 0:
     #     if not np.alltrue(np.min(joint_distr[joint_distr < 0]) > -1.0 * 1e-8):
     #         print(meta_games)
     joint_distr = remove_epsilon_negative_probs(joint_distr, epsilon=1.0)
     marginals = get_alpharank_marginals(meta_games, joint_distr)
+    results = (marginals,)
+    if return_joint:
+        results += (joint_distr,)
+    if return_epsilon:
+        results += (epsilon,)
+    return results if len(results) > 1 else marginals
+
+
+def _get_stationary_distr_batch(c):
+    """Gets stationary distributions of a [B, n, n] stack of transition matrices.
+    Solves pi (c - I) = 0 with one balance equation replaced by sum(pi) = 1 for
+    the whole batch at once.
+    Returns:
+      pi: [B, n] stationary distributions (undefined where solved is False).
+      solved: [B] boolean mask of the chains with a unique stationary
+        distribution.
+    """
+
+    batch_size, num_profiles, _ = c.shape
+    a = np.transpose(c, (0, 2, 1)) - np.eye(num_profiles)
+    a[:, -1, :] = 1.0
+    b = np.zeros((batch_size, num_profiles, 1))
+    b[:, -1, 0] = 1.0
+
+    try:
+        pi = np.linalg.solve(a, b)[..., 0]
+    except np.linalg.LinAlgError:
+        # At least one chain is reducible, so fall back to per-chain solves
+        pi = np.zeros((batch_size, num_profiles))
+        solved = np.ones(batch_size, dtype=bool)
+        for i in range(batch_size):
+            try:
+                pi[i] = np.linalg.solve(a[i], b[i])[:, 0]
+            except np.linalg.LinAlgError:
+                solved[i] = False
+        return pi, solved & np.all(np.isfinite(pi), axis=1)
+
+    return pi, np.all(np.isfinite(pi), axis=1)
+
+
+def alpharank_strategy_batch(
+    payoff_tensors,
+    return_joint=False,
+    warm_start_epsilon=None,
+    min_iters=10,
+    max_iters=100,
+    min_epsilon=1e-14,
+    **unused_kwargs
+):
+    """Returns infinite-alpha AlphaRank distributions for a stack of games.
+    Runs the epsilon sweep of sweep_pi_vs_epsilon() for B same-shaped
+    multipopulation games at once. The transition matrices of all games still in
+    the sweep are built and solved as one batch, and each game keeps its own
+    epsilon schedule and stopping criterion.
+    Args:
+      payoff_tensors: Array of shape [B, n, a_1, ..., a_n] holding B n-player
+        payoff tensors.
+      return_joint: a boolean specifying whether to also return the joint
+        distributions.
+      warm_start_epsilon: Initial value of epsilon to use.
+      min_iters: the minimum number of sweep iterations.
+      max_iters: the maximum number of sweep iterations.
+      min_epsilon: the minimum value of epsilon to be tested.
+    Returns:
+      marginals: a list with, for each game, the list of player-wise alpharank
+        marginal distributions.
+      joint_distr: [B, num_profiles] joint alpharank distributions.
+    """
+    payoff_tensors = np.asarray(payoff_tensors)
+    batch_size, num_populations = payoff_tensors.shape[:2]
+    num_strats_per_population = np.asarray(payoff_tensors.shape[2:])
+    if num_populations == 1:
+        results = [
+            alpharank_strategy(game, return_joint=True) for game in payoff_tensors
+        ]
+        marginals = [marginal for marginal, _ in results]
+        if return_joint:
+            return marginals, np.asarray([joint for _, joint in results])
+        return marginals
+
+    num_profiles = int(utils.get_num_profiles(num_strats_per_population))
+    eta = 1.0 / (np.sum(num_strats_per_population - 1))
+    population_ids, row_ids, col_ids = _get_multipop_deviation_ids(
+        num_strats_per_population
+    )
+    payoffs = np.reshape(payoff_tensors, (batch_size, num_populations, -1))
+    is_tie, is_better = _get_payoff_comparisons(
+        payoffs[:, population_ids, row_ids], payoffs[:, population_ids, col_ids]
+    )
+
+    if warm_start_epsilon is not None:
+        epsilon = np.full(batch_size, float(warm_start_epsilon))
+    else:
+        epsilon = np.full(batch_size, 0.5)
+    epsilon_mult_factor = np.full(batch_size, 0.5)
+    num_iters = np.zeros(batch_size, dtype=int)
+    alpharank_succeeded_once = np.zeros(batch_size, dtype=bool)
+    active = np.ones(batch_size, dtype=bool)
+    pi = np.zeros((batch_size, num_profiles))
+
+    while active.any():
+        idx = np.flatnonzero(active)
+        c = np.zeros((len(idx), num_profiles, num_profiles))
+        c[:, row_ids, col_ids] = eta * _get_inf_alpha_transition_weights(
+            is_tie[idx], is_better[idx], epsilon[idx, None]
+        )
+        c[:, np.arange(num_profiles), np.arange(num_profiles)] = 1 - np.sum(c, axis=2)
+        pi_new, solved = _get_stationary_distr_batch(c)
+
+        # Games whose stationary distribution was found for this epsilon
+        ok = idx[solved]
+        converged = (num_iters[ok] > min_iters) & np.all(
+            np.isclose(pi_new[solved], pi[ok]), axis=1
+        )
+        pi[ok] = pi_new[solved]
+        active[ok[converged]] = False
+        ok = ok[~converged]
+        epsilon[ok] *= epsilon_mult_factor[ok]
+        num_iters[ok] += 1
+        alpharank_succeeded_once[ok] = True
+        assert np.all(num_iters < max_iters), (
+            "Alpharank stationary distr. not found"
+            "after {} iterations of pi_vs_epsilon"
+            "sweep".format(max_iters)
+        )
+
+        # Games whose epsilon was too small, see sweep_pi_vs_epsilon()
+        failed = idx[~solved]
+        assert np.all(epsilon[failed] >= min_epsilon), (
+            "AlphaRank stationary distr. not found &" "epsilon < min_epsilon."
+        )
+        epsilon[failed] /= epsilon_mult_factor[failed]
+        failed = failed[alpharank_succeeded_once[failed]]
+        epsilon_mult_factor[failed] = (epsilon_mult_factor[failed] + 1.0) / 2.0
+        epsilon[failed] *= epsilon_mult_factor[failed]
+
+    joint_distr = np.asarray(
+        [remove_epsilon_negative_probs(joint, epsilon=1.0) for joint in pi]
+    )
+    joint_tensors = joint_distr.reshape(
+        (batch_size,) + tuple(num_strats_per_population)
+    )
+    marginals = [[] for _ in range(batch_size)]
+    for k in range(num_populations):
+        other_axes = tuple(j + 1 for j in range(num_populations) if j != k)
+        marginals_k = np.sum(joint_tensors, axis=other_axes)
+        for i in range(batch_size):
+            marginals[i].append(marginals_k[i])
     if return_joint:
         return marginals, joint_distr
     else:
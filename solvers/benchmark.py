@@ -0,0 +1,212 @@
+"""Latency and memory benchmark of the meta-solvers.
+
+Times every solver over a grid of player and action counts, on games drawn
+from game2graph.game_data.gen_game, and writes the results as JSON. When a
+baseline JSON is given, median latencies are compared against it and the
+script exits with status 1 if any solver slowed down by more than the allowed
+ratio.
+
+Usage:
+  python -m solvers.benchmark --output bench.json
+  python -m solvers.benchmark --baseline bench.json --max_slowdown 1.2
+"""
+
+import copy
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from configs import get_parser
+from game2graph.game_data import gen_game
+from solvers import (
+    alpharank_strategy,
+    projected_replicator_dynamics,
+    fictitious_play_strategy,
+    ce_strategy,
+    cce_strategy,
+    nash_strategy,
+)
+from solvers.eval import nash_conv
+
+# Solver calls with the budgets used by game_envs.envs.game_env._eval
+SOLVERS = {
+    "alpha_rank": lambda game: alpharank_strategy(game, method="sink_scc"),
+    "alpha_rank_sweep": lambda game: alpharank_strategy(game, method="sweep"),
+    "prd": lambda game: projected_replicator_dynamics(game, prd_iterations=int(2e3)),
+    "ce": lambda game: ce_strategy(game, method="lp"),
+    "ce_regret_matching": lambda game: ce_strategy(
+        game, iterations=int(5e3), method="regret_matching"
+    ),
+    "cce": lambda game: cce_strategy(game),
+    "fp": lambda game: fictitious_play_strategy(game, max_iterations=int(5e3)),
+    "nash": lambda game: nash_strategy(game),
+    "nash_conv": lambda game: nash_conv(game, [np.ones(a) / a for a in game.shape[1:]]),
+}
+# Solvers restricted to two-player games
+TWO_PLAYER_SOLVERS = ["nash"]
+
+
+def get_benchmark_parser():
+    parser = get_parser()
+    parser.add_argument(
+        "--bench_solvers",
+        type=str,
+        nargs="+",
+        default=list(SOLVERS),
+        help="The solvers to benchmark",
+    )
+    parser.add_argument(
+        "--bench_players",
+        type=int,
+        nargs="+",
+        default=[2, 3],
+        help="The player counts of the benchmark grid",
+    )
+    parser.add_argument(
+        "--bench_actions",
+        type=int,
+        nargs="+",
+        default=[2, 3, 4, 5],
+        help="The action counts of the benchmark grid",
+    )
+    parser.add_argument(
+        "--bench_games", type=int, default=5, help="The number of games per shape"
+    )
+    parser.add_argument(
+        "--bench_repeats", type=int, default=3, help="The timed calls per game"
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Where to write the JSON results"
+    )
+    parser.add_argument(
+        "--baseline", type=str, default=None, help="A JSON baseline to compare to"
+    )
+    parser.add_argument(
+        "--max_slowdown",
+        type=float,
+        default=1.25,
+        help="Largest allowed ratio of the median latency to the baseline's",
+    )
+    return parser
+
+
+def gen_benchmark_games(args, num_players, num_actions):
+    """Draws args.bench_games games with the given shape from gen_game."""
+    game_args = copy.copy(args)
+    game_args.min_players = game_args.max_players = num_players
+    game_args.min_actions = game_args.max_actions = num_actions
+    return [gen_game(game_args)[0] for _ in range(args.bench_games)]
+
+
+def benchmark_solver(solver, games, repeats):
+    """Returns latency percentiles (ms) and peak traced memory (KB) of solver."""
+    # Warm up imports and caches outside of the measurements
+    solver(games[0])
+    latencies = []
+    for game in games:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            solver(game)
+            latencies.append(1e3 * (time.perf_counter() - start))
+
+    peak_memory = 0
+    for game in games:
+        tracemalloc.start()
+        solver(game)
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {
+        "calls": len(latencies),
+        "mean_ms": float(np.mean(latencies)),
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+        "max_ms": float(np.max(latencies)),
+        "peak_kb": peak_memory / 1e3,
+    }
+
+
+def run_benchmark(args):
+    """Runs every solver on every shape of the grid and returns the results."""
+    results = []
+    for num_players in args.bench_players:
+        for num_actions in args.bench_actions:
+            np.random.seed(args.seed)
+            games = gen_benchmark_games(args, num_players, num_actions)
+            for name in args.bench_solvers:
+                if name in TWO_PLAYER_SOLVERS and num_players != 2:
+                    continue
+                result = {
+                    "solver": name,
+                    "num_players": num_players,
+                    "num_actions": num_actions,
+                }
+                result.update(
+                    benchmark_solver(SOLVERS[name], games, args.bench_repeats)
+                )
+                print(
+                    "{solver:>20} players={num_players} actions={num_actions} "
+                    "p50={p50_ms:.3f}ms p90={p90_ms:.3f}ms p99={p99_ms:.3f}ms "
+                    "peak={peak_kb:.1f}KB".format(**result)
+                )
+                results.append(result)
+    return results
+
+
+def compare_to_baseline(results, baseline, max_slowdown):
+    """Returns the results whose median latency regressed past max_slowdown."""
+    baseline = {(r["solver"], r["num_players"], r["num_actions"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        key = (result["solver"], result["num_players"], result["num_actions"])
+        if key not in baseline:
+            continue
+        ratio = result["p50_ms"] / max(baseline[key]["p50_ms"], 1e-9)
+        result["baseline_p50_ms"] = baseline[key]["p50_ms"]
+        result["slowdown"] = ratio
+        if ratio > max_slowdown:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    args = get_benchmark_parser().parse_args()
+    results = run_benchmark(args)
+
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_to_baseline(results, baseline, args.max_slowdown)
+        for result in regressions:
+            print(
+                "REGRESSION {solver} players={num_players} actions={num_actions}: "
+                "p50 {p50_ms:.3f}ms vs {baseline_p50_ms:.3f}ms "
+                "({slowdown:.2f}x)".format(**result)
+            )
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "config": {
+                        "seed": args.seed,
+                        "bench_games": args.bench_games,
+                        "bench_repeats": args.bench_repeats,
+                        "numpy": np.__version__,
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
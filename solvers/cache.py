@@ -0,0 +1,114 @@
+"""Bounded LRU cache of meta-solver results.
+
+Entries are keyed on a hash of the quantized payoff tensor, the solver name
+and the solver parameters, so solving an identical game again is a lookup.
+"""
+
+import collections
+import copy
+import hashlib
+
+import numpy as np
+
+# Payoffs are rounded to this many decimals before hashing
+DEFAULT_DECIMALS = 10
+
+_default_cache = None
+
+
+class SolverCache(object):
+    """A least-recently-used cache of solver strategies and exploitabilities."""
+
+    def __init__(self, max_size=1024, decimals=DEFAULT_DECIMALS):
+        """Initialize the cache.
+        Args:
+          max_size (int): maximal number of cached results, the least recently
+            used ones are evicted first.
+          decimals (int): number of decimals payoffs and parameters are rounded
+            to, so that equal games up to floating point noise share a key.
+        """
+        self.max_size = max_size
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, payoff_tensor, solver_name, params=None):
+        """Returns the cache key of solving payoff_tensor with a solver.
+
+        Args:
+          payoff_tensor: payoff tensor of shape [n_players, a_1, ..., a_n].
+          solver_name: name of the meta-solver.
+          params: dict of the solver parameters. Values may be scalars, strings,
+            None, arrays or nested lists/tuples of those.
+
+        Returns:
+          A bytes digest.
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(solver_name.encode())
+        self._update(hasher, payoff_tensor)
+        for name, value in sorted((params or {}).items()):
+            hasher.update(name.encode())
+            self._update(hasher, value)
+        return hasher.digest()
+
+    def _update(self, hasher, value):
+        if value is None or isinstance(value, (str, bool)):
+            hasher.update(repr(value).encode())
+        elif isinstance(value, (list, tuple)):
+            hasher.update(b"[%d" % len(value))
+            for item in value:
+                self._update(hasher, item)
+        else:
+            value = np.round(np.asarray(value, dtype=float), self.decimals)
+            # Map -0.0 to 0.0 so that both hash alike
+            value = value + 0.0
+            hasher.update(repr(value.shape).encode())
+            hasher.update(value.tobytes())
+
+    def get(self, key):
+        """Returns a copy of the entry stored under key, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return copy.deepcopy(entry)
+
+    def put(self, key, strategies, nash_conv, **extras):
+        """Stores strategies, their nash_conv and any extra values under key."""
+        entry = dict(extras, strategies=strategies, nash_conv=nash_conv)
+        self._entries[key] = copy.deepcopy(entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Returns the hit and miss counters and the number of entries."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+
+def get_solver_cache(max_size=1024):
+    """Returns the process-wide solver cache, creating it on first use.
+
+    The cache lives in the calling process only. Environments created in the
+    same process share it, e.g. those behind a DummyVecEnv or several envs
+    created by one SubprocVecEnv worker. Workers of a new SubprocVecEnv start
+    with an empty cache, so successive evaluations that recreate their vector
+    envs do not reuse each other's results.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SolverCache(max_size=max_size)
+    _default_cache.max_size = max_size
+    return _default_cache
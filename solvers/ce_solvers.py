@@ -11,14 +11,18 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""Regret-Matching Algorithm.
+"""Regret-Matching Algorithm and (Coarse) Correlated Equilibrium LPs.
 This is an N-player implementation of the regret-matching algorithm described in
 Hart & Mas-Colell 2000:
 https://onlinelibrary.wiley.com/doi/abs/10.1111/1468-0262.00153
+Exact correlated and coarse correlated equilibria are computed by a single
+linear program over the joint strategy distribution.
 """
-import collections
 
 import numpy as np
+from scipy.optimize import linprog
+
+from solvers.eval import convergence_residual
 
 # from open_spiel.python.algorithms import nfg_utils
 
@@ -31,7 +35,12 @@ INITIAL_REGRET_DENOM = 1e6
 
 
 class StrategyAverager(object):
-    """A helper class for averaging strategies for players."""
+    """A helper class for averaging strategies for players.
+
+    The players' strategies are stored concatenated, in a preallocated
+    [window_size, total_actions] ring buffer when averaging over a window, and
+    a running sum keeps appends and averages at O(total_actions).
+    """
 
     def __init__(self, num_players, action_space_shapes, window_size=None):
         """Initialize the average strategy helper object.
@@ -47,12 +56,12 @@ class StrategyAverager(object):
         self._action_space_shapes = action_space_shapes
         self._window_size = window_size
         self._num = 0
-        if self._window_size is None:
-            self._sum_meta_strategies = [
-                np.zeros(action_space_shapes[p]) for p in range(num_players)
-            ]
-        else:
-            self._window = collections.deque(maxlen=self._window_size)
+        self._offsets = np.cumsum(
+            [0] + [action_space_shapes[p] for p in range(num_players)]
+        )
+        self._sum_meta_strategies = np.zeros(self._offsets[-1])
+        if self._window_size is not None:
+            self._window = np.zeros((self._window_size, self._offsets[-1]))
 
     def append(self, meta_strategies):
         """Append the meta-strategies to the averaged sequence.
@@ -61,9 +70,20 @@ class StrategyAverager(object):
         """
         if self._window_size is None:
             for p in range(self._num_players):
-                self._sum_meta_strategies[p] += meta_strategies[p]
+                self._sum_meta_strategies[
+                    self._offsets[p] : self._offsets[p + 1]
+                ] += meta_strategies[p]
         else:
-            self._window.append(meta_strategies)
+            row = self._window[self._num % self._window_size]
+            if self._num >= self._window_size:
+                self._sum_meta_strategies -= row
+            for p in range(self._num_players):
+                row[self._offsets[p] : self._offsets[p + 1]] = meta_strategies[p]
+            if (self._num + 1) % self._window_size == 0:
+                # Recompute the sum once per cycle to bound rounding drift
+                np.sum(self._window, axis=0, out=self._sum_meta_strategies)
+            else:
+                self._sum_meta_strategies += row
         self._num += 1
 
     def average_strategies(self):
@@ -71,21 +91,12 @@ class StrategyAverager(object):
         Returns:
           The averaged strategies, as a list containing one strategy per player.
         """
-
         if self._window_size is None:
-            avg_meta_strategies = [np.copy(x) for x in self._sum_meta_strategies]
             num_strategies = self._num
         else:
-            avg_meta_strategies = [
-                np.zeros(self._action_space_shapes[p]) for p in range(self._num_players)
-            ]
-            for i in range(len(self._window)):
-                for p in range(self._num_players):
-                    avg_meta_strategies[p] += self._window[i][p]
-            num_strategies = len(self._window)
-        for p in range(self._num_players):
-            avg_meta_strategies[p] /= num_strategies
-        return avg_meta_strategies
+            num_strategies = min(self._num, self._window_size)
+        avg_meta_strategies = self._sum_meta_strategies / num_strategies
+        return np.split(avg_meta_strategies, self._offsets[1:-1])
 
 
 def _partial_multi_dot(player_payoff_tensor, strategies, index_avoided):
@@ -158,6 +169,12 @@ def regret_matching(
     iterations=int(1e5),
     gamma=1e-6,
     average_over_last_n_strategies=None,
+    tol=None,
+    check_every=100,
+    convergence_metric="strategy",
+    return_iterations=False,
+    initial_regrets=None,
+    return_regrets=False,
     **unused_kwargs
 ):
     """Runs regret-matching for the stated number of iterations.
@@ -170,10 +187,21 @@ def regret_matching(
       gamma: Minimum exploratory probability term.
       average_over_last_n_strategies: Running average window size for average
         policy computation. If None, use the whole trajectory.
+      tol: If not None, stop before the given number of iterations once the
+        convergence residual of the average strategies falls below tol.
+      check_every: Number of steps between two convergence checks.
+      convergence_metric: "strategy" or "nash_conv", see
+        solvers.eval.convergence_residual().
+      return_iterations: Whether to also return the number of steps taken.
+      initial_regrets: Cumulative regrets of each player to resume from, e.g.
+        those returned by a previous run on a nearby game.
+      return_regrets: Whether to also return the final cumulative regrets.
       **unused_kwargs: Convenient way of exposing an API compatible with other
         methods with possibly different arguments.
     Returns:
       RM-computed strategies.
+      The cumulative regrets, if return_regrets is set.
+      The number of steps taken, if return_iterations is set.
     """
     number_players = len(payoff_tensors)
     # Number of actions available to each player.
@@ -185,30 +213,222 @@ def regret_matching(
         for k in range(number_players)
     ]
 
-    regrets = [
-        np.ones(action_space_shapes[k]) / INITIAL_REGRET_DENOM
-        for k in range(number_players)
-    ]
+    if initial_regrets is not None:
+        regrets = [np.array(regret, dtype=float) for regret in initial_regrets]
+    else:
+        regrets = [
+            np.ones(action_space_shapes[k]) / INITIAL_REGRET_DENOM
+            for k in range(number_players)
+        ]
 
     averager = StrategyAverager(
         number_players, action_space_shapes, average_over_last_n_strategies
     )
     averager.append(new_strategies)
 
-    for _ in range(iterations):
+    prev_average_strategies = None
+    num_iterations = iterations
+    for i in range(iterations):
         new_strategies = _regret_matching_step(
             payoff_tensors, new_strategies, regrets, gamma
         )
         averager.append(new_strategies)
-    return averager.average_strategies()
+        if tol is not None and (i + 1) % check_every == 0:
+            average_strategies = averager.average_strategies()
+            residual = convergence_residual(
+                payoff_tensors,
+                average_strategies,
+                prev_average_strategies,
+                metric=convergence_metric,
+            )
+            if residual < tol:
+                num_iterations = i + 1
+                break
+            prev_average_strategies = average_strategies
+    results = (averager.average_strategies(),)
+    if return_regrets:
+        results += (regrets,)
+    if return_iterations:
+        results += (num_iterations,)
+    return results if len(results) > 1 else results[0]
+
+
+def _profile_ids(num_strats_per_player, player):
+    """Returns the flat profile ids as a [n_actions_player, n_other_profiles] array.
+
+    Row a holds the row-major ids of the profiles in which player plays a.
+    """
+    num_profiles = int(np.prod(num_strats_per_player))
+    profile_ids = np.arange(num_profiles).reshape(num_strats_per_player)
+    return np.moveaxis(profile_ids, player, 0).reshape(
+        num_strats_per_player[player], -1
+    )
+
+
+def _deviation_gains(payoff_tensor, player):
+    """Returns gains[a, b, r] = u(b, r) - u(a, r) of deviating from a to b.
+
+    r indexes the other players' profiles as in _profile_ids().
+    """
+    payoffs = np.moveaxis(payoff_tensor[player], player, 0)
+    payoffs = payoffs.reshape(payoffs.shape[0], -1)
+    return payoffs[None, :, :] - payoffs[:, None, :]
+
+
+def _ce_constraints(payoff_tensor):
+    """Builds the correlated equilibrium incentive constraints A, with A x <= 0.
+
+    For every player and pair of actions a != b, the expected gain of playing b
+    whenever a is recommended must be non-positive.
+    """
+    num_strats_per_player = payoff_tensor.shape[1:]
+    num_profiles = int(np.prod(num_strats_per_player))
+    constraints = []
+    for player, num_strats in enumerate(num_strats_per_player):
+        profile_ids = _profile_ids(num_strats_per_player, player)
+        gains = _deviation_gains(payoff_tensor, player)
+        player_constraints = np.zeros((num_strats, num_strats, num_profiles))
+        player_constraints[
+            np.arange(num_strats)[:, None, None],
+            np.arange(num_strats)[None, :, None],
+            profile_ids[:, None, :],
+        ] = gains
+        off_diagonal = ~np.eye(num_strats, dtype=bool)
+        constraints.append(player_constraints[off_diagonal])
+    return np.concatenate(constraints, axis=0)
+
+
+def _cce_constraints(payoff_tensor):
+    """Builds the coarse correlated equilibrium constraints A, with A x <= 0.
+
+    For every player and action b, the expected gain of always playing b instead
+    of following the recommendation must be non-positive.
+    """
+    num_strats_per_player = payoff_tensor.shape[1:]
+    num_profiles = int(np.prod(num_strats_per_player))
+    constraints = []
+    for player, num_strats in enumerate(num_strats_per_player):
+        profile_ids = _profile_ids(num_strats_per_player, player)
+        gains = _deviation_gains(payoff_tensor, player)
+        player_constraints = np.zeros((num_strats, num_profiles))
+        player_constraints[:, profile_ids.ravel()] = np.transpose(
+            gains, (1, 0, 2)
+        ).reshape(num_strats, -1)
+        constraints.append(player_constraints)
+    return np.concatenate(constraints, axis=0)
+
+
+def _solve_correlated_lp(payoff_tensor, constraints):
+    """Returns the welfare-maximizing joint distribution satisfying constraints."""
+    num_profiles = constraints.shape[1]
+    res = linprog(
+        c=-np.sum(payoff_tensor, axis=0).ravel(),
+        A_ub=constraints,
+        b_ub=np.zeros(len(constraints)),
+        A_eq=np.ones((1, num_profiles)),
+        b_eq=[1.0],
+        bounds=(0, None),
+        method="highs",
+    )
+    if not res.success:
+        raise ValueError("Correlated equilibrium LP failed: {}".format(res.message))
+    joint = np.maximum(res.x, 0)
+    return joint / np.sum(joint)
+
+
+def _joint_marginals(joint, num_strats_per_player):
+    """Returns each player's marginal strategy of a flat joint distribution."""
+    num_players = len(num_strats_per_player)
+    joint = np.reshape(joint, num_strats_per_player)
+    return [
+        np.sum(joint, axis=tuple(j for j in range(num_players) if j != player))
+        for player in range(num_players)
+    ]
+
+
+def _correlated_strategy(payoff_tensor, constraints_fn, return_joint):
+    payoff_tensor = np.asarray(payoff_tensor, dtype=float)
+    joint = _solve_correlated_lp(payoff_tensor, constraints_fn(payoff_tensor))
+    marginals = _joint_marginals(joint, payoff_tensor.shape[1:])
+    if return_joint:
+        return marginals, joint
+    return marginals
+
+
+def cce_strategy(payoff_tensor, return_joint=False, **unused_kwargs):
+    """Computes the welfare-maximizing coarse correlated equilibrium.
+
+    Args:
+      payoff_tensor: payoff tensor of shape [n_players, n_actions_1, ...].
+      return_joint: Whether to also return the joint distribution, flattened in
+        row-major profile order.
+      **unused_kwargs: Convenient way of exposing an API compatible with other
+        methods with possibly different arguments.
 
+    Returns:
+      The marginal strategy of each player.
+      The joint distribution, if return_joint is set.
+    """
+    return _correlated_strategy(payoff_tensor, _cce_constraints, return_joint)
+
+
+def ce_strategy(
+    payoff_tensor,
+    iterations=int(5e4),
+    initial_strategies=None,
+    tol=None,
+    check_every=100,
+    convergence_metric="strategy",
+    return_iterations=False,
+    method="lp",
+    return_joint=False,
+    initial_regrets=None,
+    return_regrets=False,
+):
+    """Computes a correlated equilibrium.
+
+    Args:
+      payoff_tensor: payoff tensor of shape [n_players, n_actions_1, ...].
+      iterations, initial_strategies, tol, check_every, convergence_metric,
+        initial_regrets: Options of the "regret_matching" method, see
+        regret_matching().
+      return_iterations: Whether to also return the number of steps taken (None
+        for the "lp" method).
+      method: "lp" solves for the welfare-maximizing correlated equilibrium
+        exactly; "regret_matching" approximates it by averaging the last
+        regret-matching strategies.
+      return_joint: Whether to also return the joint distribution ("lp" only).
+      return_regrets: Whether to also return the final cumulative regrets of
+        regret matching (None for the "lp" method).
+
+    Returns:
+      The marginal strategy of each player.
+      The joint distribution, if return_joint is set.
+      The cumulative regrets, if return_regrets is set.
+      The number of steps taken, if return_iterations is set.
+    """
+    if method == "lp":
+        res = _correlated_strategy(payoff_tensor, _ce_constraints, return_joint)
+        extras = (None,) * (return_regrets + return_iterations)
+        if not extras:
+            return res
+        return (res if return_joint else (res,)) + extras
+    elif method != "regret_matching":
+        raise ValueError("Unknown ce method: {}".format(method))
+    if return_joint:
+        raise ValueError("return_joint requires the lp method")
 
-def ce_strategy(payoff_tensor, iterations=int(5e4)):
     strategies = regret_matching(
         payoff_tensors=payoff_tensor,
-        initial_strategies=None,
+        initial_strategies=initial_strategies,
         iterations=iterations,
         prd_gamma=1e-8,
         average_over_last_n_strategies=10,
+        tol=tol,
+        check_every=check_every,
+        convergence_metric=convergence_metric,
+        return_iterations=return_iterations,
+        initial_regrets=initial_regrets,
+        return_regrets=return_regrets,
     )
     return strategies
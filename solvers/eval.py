@@ -1,43 +1,103 @@
-import copy
-
 import numpy as np
 
+ZERO = 1e-9
+_ACTION_SUBSCRIPTS = "abcdefghijklmnopqrstuvwxy"
+
+
+def _deviation_payoffs(payoff_tensor, strategies, player, batched=False):
+    """Returns player's expected payoff of each action against the others.
+
+    Args:
+      payoff_tensor: [a_1, ..., a_n] payoffs of player, with a leading batch
+        axis if batched.
+      strategies: strategy of each player, with a leading batch axis if batched.
+      player: the deviating player.
+      batched: whether the inputs hold a batch of games.
+
+    Returns:
+      The [a_player] (or [B, a_player]) deviation payoffs.
+    """
+    num_players = len(strategies)
+    batch = "z" if batched else ""
+    actions = _ACTION_SUBSCRIPTS[:num_players]
+    others = [j for j in range(num_players) if j != player]
+    subscripts = "{}->{}".format(
+        ",".join([batch + actions] + [batch + actions[j] for j in others]),
+        batch + actions[player],
+    )
+    return np.einsum(subscripts, payoff_tensor, *[strategies[j] for j in others])
+
 
 def nash_conv(meta_game, strategies):
-    ZERO = 1e-9
-    n_players = meta_game.shape[0]
-    action_dims = meta_game.shape[1:]
-    # strategies = np.array([[1.0 / i for _ in range(i)] for i in action_dims])
-    best_responses = []
-    game_vectors = []
+    """Returns each player's exploitability of a strategy profile.
+
+    Args:
+      meta_game: payoff tensor of shape [n_players, a_1, ..., a_n].
+      strategies: (possibly unnormalized) strategy of each player.
+
+    Returns:
+      A list with the gain of each player's best response, clipped to 0 below
+      ZERO.
+    """
+    meta_game = np.asarray(meta_game, dtype=float)
+    strategies = [
+        np.asarray(strategy, dtype=float) / np.sum(strategy) for strategy in strategies
+    ]
     exploitabilities = []
-    for i in range(n_players):
-        meta_game_table = copy.deepcopy(meta_game[i])
-        for j in range(n_players):
-            if i == j:
-                continue
-            else:
-                meta_game_table = np.expand_dims(
-                    np.average(
-                        meta_game_table,
-                        axis=j,
-                        weights=(strategies[j]),
-                    ),
-                    axis=j,
-                )
-        best_responses.append(np.argmax(meta_game_table, axis=i))
-        game_vectors.append(meta_game_table)
-        best_utility = np.max(meta_game_table, axis=i)
-        mean_utility = np.average(
-            meta_game_table,
-            axis=i,
-            weights=(strategies[i]),
-        )
-        # print(best_utility.shape)
-        # print(mean_utility)
-        for _ in range(n_players):
-            best_utility = np.squeeze(best_utility, axis=0)
-            mean_utility = np.squeeze(mean_utility, axis=0)
-        exploitability = best_utility - mean_utility
+    for i in range(meta_game.shape[0]):
+        values = _deviation_payoffs(meta_game[i], strategies, i)
+        exploitability = np.max(values) - np.dot(values, strategies[i])
         exploitabilities.append(exploitability if exploitability > ZERO else 0)
     return exploitabilities
+
+
+def nash_conv_batch(meta_games, strategies):
+    """Batched nash_conv() over B same-shaped games.
+
+    Args:
+      meta_games: payoff tensors of shape [B, n_players, a, ..., a].
+      strategies: [B, n_players, a] strategies, as returned by
+        projected_replicator_dynamics_batch().
+
+    Returns:
+      The [B, n_players] exploitabilities, clipped to 0 below ZERO.
+    """
+    meta_games = np.asarray(meta_games, dtype=float)
+    strategies = np.asarray(strategies, dtype=float)
+    strategies = strategies / np.sum(strategies, axis=-1, keepdims=True)
+    player_strategies = [strategies[:, j] for j in range(strategies.shape[1])]
+    exploitabilities = np.empty(strategies.shape[:2])
+    for i in range(meta_games.shape[1]):
+        values = _deviation_payoffs(
+            meta_games[:, i], player_strategies, i, batched=True
+        )
+        exploitabilities[:, i] = np.max(values, axis=-1) - np.sum(
+            values * player_strategies[i], axis=-1
+        )
+    return np.where(exploitabilities > ZERO, exploitabilities, 0.0)
+
+
+def convergence_residual(meta_game, strategies, prev_strategies, metric="strategy"):
+    """Residual used by the iterative solvers' tolerance-based early stopping.
+
+    Args:
+      meta_game: payoff tensor of shape [n_players, a_1, ..., a_n].
+      strategies: current (averaged) strategy of each player.
+      prev_strategies: strategies at the previous convergence check, or None.
+      metric: "strategy" for the largest absolute change of any player's
+        strategy since the previous check, or "nash_conv" for the sum of the
+        players' exploitabilities of the current strategies.
+
+    Returns:
+      The residual, or inf if it cannot be computed yet.
+    """
+    if metric == "nash_conv":
+        return sum(nash_conv(np.asarray(meta_game), strategies))
+    if metric != "strategy":
+        raise ValueError("Unknown convergence metric: {}".format(metric))
+    if prev_strategies is None:
+        return np.inf
+    return max(
+        np.max(np.abs(np.asarray(s) - np.asarray(p)))
+        for s, p in zip(strategies, prev_strategies)
+    )
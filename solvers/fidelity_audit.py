@@ -0,0 +1,240 @@
+"""Fidelity-vs-cost audit of the meta-solver budgets.
+
+Runs game_envs.envs.game_env with every meta-solver variant (iteration
+budgets, early-stopping tolerances, fast and exact methods) over a dataset
+from gen_game_datasets. All variants see the same actions, hence the same
+modified games, so their exploitabilities can be compared step by step with
+those of a high-budget reference. For each variant, the audit reports the
+solver time per evaluation against the error in nash_conv and in the per-step
+training reward, and the equilibrium gap of the solutions on the games they
+solve.
+
+Correlated equilibria are not unique, so ce variants, which may pick other
+valid equilibria than the reference, are scored by their equilibrium gap
+only. Exact solvers (nash, cce) have nothing to audit and are skipped.
+
+Usage:
+  python -m solvers.fidelity_audit --audit_solvers prd fp --output audit.json
+"""
+
+import copy
+import json
+import time
+
+import numpy as np
+
+from configs import get_parser
+from game2graph.game_data import gen_game_datasets
+from game_envs.envs import game_env
+from solvers.eval import nash_conv
+
+# Args field holding the iteration budget of each iterative meta-solver
+BUDGET_ARGS = {
+    "prd": "prd_iterations",
+    "fp": "fp_iterations",
+    "ce": "ce_iterations",
+}
+# Meta-solvers whose variants may return other equilibria than the reference
+SELF_SCORED_SOLVERS = ["ce"]
+
+
+def get_audit_parser():
+    parser = get_parser()
+    parser.add_argument(
+        "--audit_solvers",
+        type=str,
+        nargs="+",
+        default=["prd", "fp", "ce", "alpha_rank"],
+        help="The meta solvers to audit",
+    )
+    parser.add_argument(
+        "--audit_budgets",
+        type=int,
+        nargs="+",
+        default=[250, 500, 1000, 2000, 5000],
+        help="The iteration budgets of the iterative meta solvers",
+    )
+    parser.add_argument(
+        "--audit_tols",
+        type=float,
+        nargs="+",
+        default=[0.0, 1e-3],
+        help="The early-stopping tolerances (0: no early stopping)",
+    )
+    parser.add_argument(
+        "--audit_reference_budget",
+        type=int,
+        default=20000,
+        help="The iteration budget of the reference solves",
+    )
+    parser.add_argument(
+        "--audit_games", type=int, default=5, help="The number of audited games"
+    )
+    parser.add_argument(
+        "--audit_steps", type=int, default=10, help="The env steps per game"
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Where to write the JSON results"
+    )
+    return parser
+
+
+def audit_variants(args, meta_solver):
+    """Returns the reference and the audited variants of a meta-solver.
+
+    Each variant is a (name, args overrides) pair. Exact solvers have no
+    variants.
+    """
+    if meta_solver in BUDGET_ARGS:
+        budget_arg = BUDGET_ARGS[meta_solver]
+        base = {"ce_method": "regret_matching"} if meta_solver == "ce" else {}
+        reference = dict(
+            base, **{budget_arg: args.audit_reference_budget, "solver_tol": None}
+        )
+        variants = [
+            (
+                "iterations={},tol={}".format(budget, tol or None),
+                dict(base, **{budget_arg: budget, "solver_tol": tol or None}),
+            )
+            for budget in args.audit_budgets
+            for tol in args.audit_tols
+        ]
+        if meta_solver == "ce":
+            variants.append(("lp", {"ce_method": "lp"}))
+    elif meta_solver == "alpha_rank":
+        reference = {"alpharank_method": "sweep"}
+        variants = [
+            ("sink_scc", {"alpharank_method": "sink_scc"}),
+            ("sweep", {"alpharank_method": "sweep"}),
+        ]
+    else:
+        reference = {}
+        variants = []
+    return ("reference", reference), variants
+
+
+def run_variant(dataset, args, meta_solver, overrides, actions):
+    """Plays the audit episodes with one meta-solver variant.
+
+    Returns:
+      The [games, steps + 1] exploitabilities of the original games, the
+      [games, steps + 1] equilibrium gaps of the solutions on the games they
+      solve, the solver time per evaluation in ms and the mean iterations
+      taken.
+    """
+    variant_args = copy.copy(args)
+    variant_args.meta_solver = meta_solver
+    variant_args.max_steps = args.audit_steps
+    # Measure the solvers, not the cache
+    variant_args.solver_cache_size = 0
+    variant_args.__dict__.update(overrides)
+    env = game_env(dataset, variant_args, is_train=False)
+
+    # Keep the solutions to measure their equilibrium gap after the timing
+    solutions = []
+    solve = env._solve
+
+    def recording_solve():
+        res, state = solve()
+        solutions.append((np.copy(env.current_game), res))
+        return res, state
+
+    env._solve = recording_solve
+
+    num_games, num_steps = actions.shape[:2]
+    nash_convs = np.zeros((num_games, num_steps + 1))
+    iterations = []
+    start = time.perf_counter()
+    for game in range(num_games):
+        env.reset()
+        nash_convs[game, 0] = env.init_nc
+        for step in range(num_steps):
+            _, _, _, info = env.step(actions[game, step])
+            nash_convs[game, step + 1] = env.pre_nc
+            if info["solver_iterations"] is not None:
+                iterations.append(info["solver_iterations"])
+    eval_ms = 1e3 * (time.perf_counter() - start) / nash_convs.size
+    gaps = np.reshape(
+        [sum(nash_conv(game, res)) for game, res in solutions], nash_convs.shape
+    )
+    return nash_convs, gaps, eval_ms, np.mean(iterations) if iterations else None
+
+
+def _step_rewards(nash_convs):
+    """Returns the training step rewards of the [games, steps + 1] nash_convs."""
+    return nash_convs[:, :-1] - nash_convs[:, 1:]
+
+
+def run_audit(args):
+    """Audits every variant of every meta-solver and returns the results."""
+    dataset_args = copy.copy(args)
+    dataset_args.train_number = args.audit_games
+    dataset_args.test_number = 0
+    np.random.seed(args.seed)
+    dataset, _ = gen_game_datasets(dataset_args)
+    actions = np.random.randn(args.audit_games, args.audit_steps, args.action_size)
+
+    results = []
+    for meta_solver in args.audit_solvers:
+        (_, reference), variants = audit_variants(args, meta_solver)
+        if not variants:
+            print("{} is exact, skipping it".format(meta_solver))
+            continue
+        ref_nash_convs, ref_gaps, ref_ms, _ = run_variant(
+            dataset, args, meta_solver, reference, actions
+        )
+        ref_step_rewards = _step_rewards(ref_nash_convs)
+        print(
+            "{} reference: {:.3f}ms per eval, equilibrium gap {:.2e}".format(
+                meta_solver, ref_ms, np.mean(ref_gaps)
+            )
+        )
+        for name, overrides in variants:
+            nash_convs, gaps, eval_ms, iterations = run_variant(
+                dataset, args, meta_solver, overrides, actions
+            )
+            result = {
+                "solver": meta_solver,
+                "variant": name,
+                "overrides": overrides,
+                "eval_ms": eval_ms,
+                "reference_eval_ms": ref_ms,
+                "mean_iterations": iterations,
+                "equilibrium_gap": float(np.mean(gaps)),
+                "reference_equilibrium_gap": float(np.mean(ref_gaps)),
+                "nash_conv_mae": None,
+                "nash_conv_max_error": None,
+                "step_reward_mae": None,
+            }
+            message = (
+                "{solver:>12} {variant:>28}: {eval_ms:9.3f}ms per eval, "
+                "equilibrium gap {equilibrium_gap:.2e}"
+            )
+            if meta_solver not in SELF_SCORED_SOLVERS:
+                nash_conv_error = np.abs(nash_convs - ref_nash_convs)
+                step_rewards = _step_rewards(nash_convs)
+                result["nash_conv_mae"] = float(np.mean(nash_conv_error))
+                result["nash_conv_max_error"] = float(np.max(nash_conv_error))
+                result["step_reward_mae"] = float(
+                    np.mean(np.abs(step_rewards - ref_step_rewards))
+                )
+                message += (
+                    ", nash_conv mae {nash_conv_mae:.2e} "
+                    "(max {nash_conv_max_error:.2e}), "
+                    "step reward mae {step_reward_mae:.2e}"
+                )
+            print(message.format(**result))
+            results.append(result)
+    return results
+
+
+def main():
+    args = get_audit_parser().parse_args()
+    results = run_audit(args)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,111 @@
-import copy
-
 import numpy as np
 
+from solvers.eval import convergence_residual
+
+
+def _contract_others(payoff_tensor, tensor_players, strategies, player):
+    """Contracts every axis of payoff_tensor but player's with the strategies.
+
+    Args:
+      payoff_tensor: tensor whose k-th axis holds the actions of
+        tensor_players[k].
+      tensor_players: the player of each axis of payoff_tensor.
+      strategies: (unnormalized) strategy of each player.
+      player: the player whose axis is kept.
+
+    Returns:
+      The vector of player's (unnormalized) expected payoffs per action.
+    """
+    for axis in reversed(range(len(tensor_players))):
+        other = tensor_players[axis]
+        if other != player:
+            payoff_tensor = np.tensordot(
+                payoff_tensor, strategies[other], axes=([axis], [0])
+            )
+    return payoff_tensor
+
+
+def fictitious_play_strategy(
+    meta_game,
+    max_iterations=int(5e4),
+    initial_strategies=None,
+    initial_weight=1.0,
+    tol=None,
+    check_every=100,
+    convergence_metric="strategy",
+    return_iterations=False,
+):
+    """Runs fictitious play, returning the players' empirical strategies.
+
+    Each player's expected payoffs against the others' play counts are kept in
+    running accumulators. When player j adds a best response b, the others'
+    accumulators grow by the payoff slice at b along j's axis, contracted with
+    the remaining counts: O(actions) work per iteration in two-player games,
+    instead of a full tensor contraction.
+
+    Args:
+      meta_game: payoff tensor of shape [n_players, a_1, ..., a_n].
+      max_iterations: Maximal number of fictitious play iterations.
+      initial_strategies: Strategies to warm start from, if any.
+      initial_weight: Number of past plays the initial strategies count for.
+      tol: If not None, stop before max_iterations once the convergence residual
+        of the average strategies falls below tol.
+      check_every: Number of iterations between two convergence checks.
+      convergence_metric: "strategy" or "nash_conv", see
+        solvers.eval.convergence_residual().
+      return_iterations: Whether to also return the number of iterations taken.
 
-def fictitious_play_strategy(meta_game, max_iterations=int(5e4)):
+    Returns:
+      FP-computed strategies.
+      The number of iterations taken, if return_iterations is set.
+    """
     n_players = meta_game.shape[0]
     action_dims = meta_game.shape[1:]
-    strategies = [np.array([1.0 / i for _ in range(i)]) for i in action_dims]
-    # strategies = np.array([([1.0 / i for _ in range(i)]) for i in action_dims])
-    # print(type(strategies[0]))
+    if initial_strategies is None:
+        strategies = [np.array([1.0 / i for _ in range(i)]) for i in action_dims]
+        initial_weight = 1.0
+    else:
+        # Warm start: the initial strategies count as initial_weight past plays
+        strategies = [
+            initial_weight * np.array(strategy, dtype=float)
+            for strategy in initial_strategies
+        ]
+    players = list(range(n_players))
+    expected_payoffs = [
+        _contract_others(meta_game[i], players, strategies, i) for i in players
+    ]
+    prev_average_strategies = None
+    num_iterations = max_iterations
     for cur_iter in range(max_iterations):
-        best_responses = []
-        for i in range(n_players):
-            meta_game_table = copy.deepcopy(meta_game[i])
-            for j in range(n_players):
-                if i == j:
-                    continue
-                else:
-                    meta_game_table = np.expand_dims(
-                        np.average(
-                            meta_game_table,
-                            axis=j,
-                            weights=(strategies[j] / (cur_iter + 1)),
-                        ),
-                        axis=j,
-                    )
-            best_responses.append(np.argmax(meta_game_table, axis=i))
-        for i in range(n_players):
-            strategies[i][best_responses[i]] += 1
+        best_responses = [np.argmax(expected_payoffs[i]) for i in players]
+        for j in players:
+            slice_players = players[:j] + players[j + 1 :]
+            for i in slice_players:
+                expected_payoffs[i] += _contract_others(
+                    np.take(meta_game[i], best_responses[j], axis=j),
+                    slice_players,
+                    strategies,
+                    i,
+                )
+            strategies[j][best_responses[j]] += 1
+        if tol is not None and (cur_iter + 1) % check_every == 0:
+            average_strategies = [
+                strategy / (cur_iter + 1 + initial_weight) for strategy in strategies
+            ]
+            residual = convergence_residual(
+                meta_game,
+                average_strategies,
+                prev_average_strategies,
+                metric=convergence_metric,
+            )
+            if residual < tol:
+                num_iterations = cur_iter + 1
+                break
+            prev_average_strategies = average_strategies
     for strategy in strategies:
-        strategy /= max_iterations + 1
+        strategy /= num_iterations + initial_weight
+    if return_iterations:
+        return strategies, num_iterations
     return strategies
 
 
@@ -0,0 +1,233 @@
+"""Exact Nash equilibrium solvers for two-player games.
+
+Zero-sum (and constant-sum) games are solved with one linear program per
+player. General-sum games are solved with the Lemke-Howson algorithm, using
+support enumeration as a fallback for (numerically) degenerate games:
+  Lemke & Howson, 1964: https://doi.org/10.1137/0112033
+  Nisan et al., Algorithmic Game Theory, Chapter 3.
+"""
+
+import itertools
+
+import numpy as np
+from scipy.optimize import linprog
+
+from solvers.eval import nash_conv
+
+# Pivots with smaller coefficients are treated as zero
+PIVOT_TOL = 1e-12
+# Maximal nash_conv of an accepted equilibrium, relative to the payoff range
+NASH_CONV_TOL = 1e-8
+
+
+def _zero_sum_nash(payoff_matrix):
+    """Solves a two-player zero-sum game given the row player's payoffs.
+
+    Args:
+      payoff_matrix: [m, n] payoffs of the row player.
+
+    Returns:
+      The maximin strategies of the row and the column player.
+    """
+    m, n = payoff_matrix.shape
+
+    # Row player: max v s.t. x^T A >= v, sum(x) = 1, x >= 0
+    res_row = linprog(
+        c=np.concatenate([np.zeros(m), [-1.0]]),
+        A_ub=np.hstack([-payoff_matrix.T, np.ones((n, 1))]),
+        b_ub=np.zeros(n),
+        A_eq=np.concatenate([np.ones(m), [0.0]])[None, :],
+        b_eq=[1.0],
+        bounds=[(0, None)] * m + [(None, None)],
+        method="highs",
+    )
+    # Column player: min w s.t. A y <= w, sum(y) = 1, y >= 0
+    res_col = linprog(
+        c=np.concatenate([np.zeros(n), [1.0]]),
+        A_ub=np.hstack([payoff_matrix, -np.ones((m, 1))]),
+        b_ub=np.zeros(m),
+        A_eq=np.concatenate([np.ones(n), [0.0]])[None, :],
+        b_eq=[1.0],
+        bounds=[(0, None)] * n + [(None, None)],
+        method="highs",
+    )
+    if not (res_row.success and res_col.success):
+        raise ValueError("Zero-sum linear program failed")
+    return [_normalize(res_row.x[:m]), _normalize(res_col.x[:n])]
+
+
+def _pivot(tableau, basis, entering_label):
+    """Pivots entering_label into the basis and returns the leaving label.
+
+    The tableau has one column per label followed by the right-hand side.
+    """
+    column = tableau[:, entering_label]
+    positive = column > PIVOT_TOL
+    if not positive.any():
+        raise ValueError("Unbounded Lemke-Howson pivot")
+    ratios = np.full(len(column), np.inf)
+    ratios[positive] = tableau[positive, -1] / column[positive]
+    pivot_row = np.argmin(ratios)
+
+    tableau[pivot_row] /= tableau[pivot_row, entering_label]
+    for row in range(len(tableau)):
+        if row != pivot_row:
+            tableau[row] -= tableau[row, entering_label] * tableau[pivot_row]
+    leaving_label = basis[pivot_row]
+    basis[pivot_row] = entering_label
+    return leaving_label
+
+
+def _lemke_howson(row_payoffs, col_payoffs, initial_dropped_label=0, max_pivots=None):
+    """Finds one Nash equilibrium of a bimatrix game with Lemke-Howson.
+
+    Labels 0, ..., m - 1 are the row player's strategies and m, ..., m + n - 1
+    the column player's. The row tableau describes {x >= 0 : B^T x <= 1} and
+    the column tableau {y >= 0 : A y <= 1}, for positive payoffs A and B.
+
+    Args:
+      row_payoffs: [m, n] payoffs A of the row player.
+      col_payoffs: [m, n] payoffs B of the column player.
+      initial_dropped_label: The label that is dropped first.
+      max_pivots: Maximal number of pivots before giving up.
+
+    Returns:
+      The strategies of the row and the column player.
+    """
+    m, n = row_payoffs.shape
+    # Shift the payoffs so that both polytopes are bounded
+    row_payoffs = row_payoffs - np.min(row_payoffs) + 1
+    col_payoffs = col_payoffs - np.min(col_payoffs) + 1
+    max_pivots = max_pivots or 10 * (m + n) ** 2
+
+    # Columns: x (labels 0..m-1), row slacks (labels m..m+n-1), right-hand side
+    row_tableau = np.hstack([col_payoffs.T, np.eye(n), np.ones((n, 1))])
+    row_basis = list(range(m, m + n))
+    # Columns: column slacks (labels 0..m-1), y (labels m..m+n-1), right-hand side
+    col_tableau = np.hstack([np.eye(m), row_payoffs, np.ones((m, 1))])
+    col_basis = list(range(m))
+
+    # The dropped label is non-basic in exactly one of the tableaux
+    tableaux = [(row_tableau, row_basis), (col_tableau, col_basis)]
+    if initial_dropped_label >= m:
+        tableaux.reverse()
+    entering_label = initial_dropped_label
+    for num_pivots in range(max_pivots):
+        tableau, basis = tableaux[num_pivots % 2]
+        entering_label = _pivot(tableau, basis, entering_label)
+        if entering_label == initial_dropped_label:
+            break
+    else:
+        raise ValueError("Lemke-Howson did not terminate")
+
+    row_strategy = np.zeros(m)
+    for row, label in enumerate(row_basis):
+        if label < m:
+            row_strategy[label] = row_tableau[row, -1]
+    col_strategy = np.zeros(n)
+    for row, label in enumerate(col_basis):
+        if label >= m:
+            col_strategy[label - m] = col_tableau[row, -1]
+    return [_normalize(row_strategy), _normalize(col_strategy)]
+
+
+def _support_enumeration(row_payoffs, col_payoffs, tol=1e-10):
+    """Finds one Nash equilibrium by enumerating equal-sized supports.
+
+    Args:
+      row_payoffs: [m, n] payoffs A of the row player.
+      col_payoffs: [m, n] payoffs B of the column player.
+      tol: Numerical tolerance of the feasibility checks.
+
+    Returns:
+      The strategies of the row and the column player, or None.
+    """
+    m, n = row_payoffs.shape
+    for size in range(1, min(m, n) + 1):
+        for row_support in itertools.combinations(range(m), size):
+            for col_support in itertools.combinations(range(n), size):
+                # y makes the row player indifferent over row_support
+                y = _indifferent_strategy(row_payoffs[np.ix_(row_support, col_support)])
+                if y is None or np.any(y < -tol):
+                    continue
+                # x makes the column player indifferent over col_support
+                x = _indifferent_strategy(
+                    col_payoffs[np.ix_(row_support, col_support)].T
+                )
+                if x is None or np.any(x < -tol):
+                    continue
+                row_strategy = np.zeros(m)
+                row_strategy[list(row_support)] = np.maximum(x, 0)
+                col_strategy = np.zeros(n)
+                col_strategy[list(col_support)] = np.maximum(y, 0)
+                row_values = row_payoffs.dot(col_strategy)
+                col_values = row_strategy.dot(col_payoffs)
+                if (
+                    np.max(row_values) <= np.max(row_values[list(row_support)]) + tol
+                    and np.max(col_values)
+                    <= np.max(col_values[list(col_support)]) + tol
+                ):
+                    return [_normalize(row_strategy), _normalize(col_strategy)]
+    return None
+
+
+def _indifferent_strategy(payoff_matrix):
+    """Returns the mixed strategy over columns equalizing all rows' payoffs."""
+    size = len(payoff_matrix)
+    system = np.zeros((size + 1, size + 1))
+    system[:size, :size] = payoff_matrix
+    system[:size, size] = -1.0
+    system[size, :size] = 1.0
+    rhs = np.zeros(size + 1)
+    rhs[size] = 1.0
+    try:
+        return np.linalg.solve(system, rhs)[:size]
+    except np.linalg.LinAlgError:
+        return None
+
+
+def _normalize(strategy):
+    strategy = np.maximum(strategy, 0)
+    return strategy / np.sum(strategy)
+
+
+def nash_strategy(meta_game, **unused_kwargs):
+    """Computes an exact Nash equilibrium of a two-player game.
+
+    Constant-sum games are solved by linear programming. General-sum games are
+    solved with Lemke-Howson, trying every initial dropped label before falling
+    back to support enumeration.
+
+    Args:
+      meta_game: payoff tensor of shape [2, m, n].
+      **unused_kwargs: Convenient way of exposing an API compatible with other
+        methods with possibly different arguments.
+
+    Returns:
+      A list with the equilibrium strategy of each player.
+    """
+    meta_game = np.asarray(meta_game, dtype=float)
+    if meta_game.shape[0] != 2:
+        raise ValueError(
+            "The nash meta solver only supports two-player games, got {}".format(
+                meta_game.shape[0]
+            )
+        )
+    row_payoffs, col_payoffs = meta_game
+    payoff_sum = row_payoffs + col_payoffs
+    if np.allclose(payoff_sum, payoff_sum.flat[0], atol=1e-12):
+        return _zero_sum_nash(row_payoffs)
+
+    tol = NASH_CONV_TOL * max(np.ptp(meta_game), 1.0)
+    for label in range(sum(row_payoffs.shape)):
+        try:
+            strategies = _lemke_howson(row_payoffs, col_payoffs, label)
+        except ValueError:
+            continue
+        if sum(nash_conv(meta_game, strategies)) <= tol:
+            return strategies
+
+    strategies = _support_enumeration(row_payoffs, col_payoffs)
+    if strategies is None:
+        raise ValueError("No Nash equilibrium found")
+    return strategies
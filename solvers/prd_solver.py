@@ -22,8 +22,13 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
+
 import numpy as np
 
+from solvers.ce_solvers import StrategyAverager
+from solvers.eval import convergence_residual
+
 
 def _partial_multi_dot(player_payoff_tensor, strategies, index_avoided):
     """Computes a generalized dot product avoiding one dimension.
@@ -167,6 +172,10 @@ def projected_replicator_dynamics(
     prd_gamma=1e-6,
     average_over_last_n_strategies=None,
     use_approx=False,
+    tol=None,
+    check_every=100,
+    convergence_metric="strategy",
+    return_iterations=False,
     **unused_kwargs
 ):
     """The Projected Replicator Dynamics algorithm.
@@ -181,13 +190,21 @@ def projected_replicator_dynamics(
       prd_dt: Update amplitude term.
       prd_gamma: Minimum exploratory probability term.
       average_over_last_n_strategies: Running average window size for average
-        policy computation. If None, use the whole trajectory.
+        policy computation. If None, use the whole trajectory, averaged with a
+        constant-memory running sum.
       use_approx: use the approximate simplex projection.
+      tol: If not None, stop before prd_iterations once the convergence
+        residual of the average strategies falls below tol.
+      check_every: Number of steps between two convergence checks.
+      convergence_metric: "strategy" or "nash_conv", see
+        solvers.eval.convergence_residual().
+      return_iterations: Whether to also return the number of steps taken.
       **unused_kwargs: Convenient way of exposing an API compatible with other
         methods with possibly different arguments.
 
     Returns:
-      PRD-computed strategies.
+      PRD-computed strategies, as a list with one array per player.
+      The number of steps taken, if return_iterations is set.
     """
     number_players = len(payoff_tensors)
     # Number of actions available to each player.
@@ -199,14 +216,187 @@ def projected_replicator_dynamics(
         for k in range(number_players)
     ]
 
-    average_over_last_n_strategies = average_over_last_n_strategies or prd_iterations
-
-    meta_strategy_window = []
+    averager = StrategyAverager(
+        number_players, action_space_shapes, average_over_last_n_strategies
+    )
+    prev_average_strategies = None
+    num_iterations = prd_iterations
     for i in range(prd_iterations):
         new_strategies = _projected_replicator_dynamics_step(
             payoff_tensors, new_strategies, prd_dt, prd_gamma, use_approx
         )
-        if i >= prd_iterations - average_over_last_n_strategies:
-            meta_strategy_window.append(new_strategies)
-    average_new_strategies = np.mean(meta_strategy_window, axis=0)
+        averager.append(new_strategies)
+        if tol is not None and (i + 1) % check_every == 0:
+            average_new_strategies = averager.average_strategies()
+            residual = convergence_residual(
+                payoff_tensors,
+                average_new_strategies,
+                prev_average_strategies,
+                metric=convergence_metric,
+            )
+            if residual < tol:
+                num_iterations = i + 1
+                break
+            prev_average_strategies = average_new_strategies
+    average_new_strategies = averager.average_strategies()
+    if return_iterations:
+        return average_new_strategies, num_iterations
     return average_new_strategies
+
+
+def _simplex_projection_batch(updated_strategies, gamma=0.0):
+    """Batched _simplex_projection() along the last axis of updated_strategies."""
+    n = updated_strategies.shape[-1]
+    idx = np.arange(1, n + 1)
+    u = -np.sort(-updated_strategies, axis=-1)
+    u_tmp = (1 - np.cumsum(u, axis=-1) - (n - idx) * gamma) / idx
+    below = u + u_tmp <= gamma
+    rho = np.where(below.any(axis=-1), np.argmax(below, axis=-1), n)
+    lam = np.take_along_axis(u_tmp, ((rho - 1) % n)[..., None], axis=-1)
+    return np.maximum(updated_strategies + lam, gamma)
+
+
+def _approx_simplex_projection_batch(updated_strategies, gamma=0.0):
+    """Batched _approx_simplex_projection() along the last axis."""
+    updated_strategies = np.maximum(updated_strategies, gamma)
+    return updated_strategies / np.sum(updated_strategies, axis=-1, keepdims=True)
+
+
+def _batch_value_subscripts(number_players):
+    """Returns, per player, the einsum subscripts of its action values.
+
+    The operands are the [B, a_1, ..., a_n] payoffs of the player followed by the
+    [B, a] strategies of every other player.
+    """
+    actions = "abcdefghijklmnopqrstuvwxy"[:number_players]
+    subscripts = []
+    for player in range(number_players):
+        others = ["z" + actions[j] for j in range(number_players) if j != player]
+        subscripts.append(
+            "z{},{}->z{}".format(actions, ",".join(others), actions[player])
+        )
+    return subscripts
+
+
+def _projected_replicator_dynamics_step_batch(
+    payoff_tensors, strategies, dt, gamma, use_approx, subscripts, paths
+):
+    """Does one step of the projected replicator dynamics on a batch of games.
+
+    Args:
+      payoff_tensors: [B, n, a, ..., a] payoff tensors.
+      strategies: [B, n, a] strategies used by each player in each game.
+      dt: Update amplitude term.
+      gamma: Minimum exploratory probability term.
+      use_approx: use approximate simplex projection.
+      subscripts: Per-player einsum subscripts of _batch_value_subscripts().
+      paths: Per-player contraction paths of these einsums.
+
+    Returns:
+      The [B, n, a] updated strategies.
+    """
+    number_players = strategies.shape[1]
+    values_per_strategy = np.stack(
+        [
+            np.einsum(
+                subscripts[player],
+                payoff_tensors[:, player],
+                *[strategies[:, j] for j in range(number_players) if j != player],
+                optimize=paths[player]
+            )
+            for player in range(number_players)
+        ],
+        axis=1,
+    )
+    average_return = np.sum(values_per_strategy * strategies, axis=-1, keepdims=True)
+    delta = strategies * (values_per_strategy - average_return)
+
+    updated_strategies = strategies + dt * delta
+    if use_approx:
+        return _approx_simplex_projection_batch(updated_strategies, gamma)
+    return _simplex_projection_batch(updated_strategies, gamma)
+
+
+def projected_replicator_dynamics_batch(
+    payoff_tensors,
+    prd_initial_strategies=None,
+    prd_iterations=int(1e5),
+    prd_dt=1e-3,
+    prd_gamma=1e-6,
+    average_over_last_n_strategies=None,
+    use_approx=False,
+    **unused_kwargs
+):
+    """The Projected Replicator Dynamics algorithm on a stack of games.
+
+    Runs projected_replicator_dynamics() for B same-shaped games at once. Each
+    iteration computes every player's action values over the whole batch with a
+    single einsum, and projects all strategies in one call.
+
+    Args:
+      payoff_tensors: Array of shape [B, n, a, ..., a] holding B n-player payoff
+        tensors in which every player has a actions.
+      prd_initial_strategies: Initial [B, n, a] strategies, if any.
+      prd_iterations: Number of algorithmic steps to take before returning an
+        answer.
+      prd_dt: Update amplitude term.
+      prd_gamma: Minimum exploratory probability term.
+      average_over_last_n_strategies: Running average window size for average
+        policy computation. If None, use the whole trajectory, averaged with a
+        constant-memory running sum.
+      use_approx: use the approximate simplex projection.
+      **unused_kwargs: Convenient way of exposing an API compatible with other
+        methods with possibly different arguments.
+
+    Returns:
+      The [B, n, a] PRD-computed strategies.
+    """
+    payoff_tensors = np.asarray(payoff_tensors, dtype=float)
+    batch_size, number_players = payoff_tensors.shape[:2]
+    action_space_shapes = payoff_tensors.shape[2:]
+    if len(set(action_space_shapes)) != 1:
+        raise ValueError(
+            "Batched PRD needs the same number of actions for every player, "
+            "got {}".format(action_space_shapes)
+        )
+    num_actions = action_space_shapes[0]
+
+    if prd_initial_strategies is None:
+        new_strategies = np.full(
+            (batch_size, number_players, num_actions), 1.0 / num_actions
+        )
+    else:
+        new_strategies = np.array(prd_initial_strategies, dtype=float)
+
+    subscripts = _batch_value_subscripts(number_players)
+    paths = [
+        np.einsum_path(
+            subscripts[player],
+            payoff_tensors[:, player],
+            *[new_strategies[:, j] for j in range(number_players) if j != player],
+            optimize="optimal"
+        )[0]
+        for player in range(number_players)
+    ]
+
+    if average_over_last_n_strategies is None:
+        sum_strategies = np.zeros_like(new_strategies)
+    else:
+        meta_strategy_window = collections.deque(maxlen=average_over_last_n_strategies)
+    for _ in range(prd_iterations):
+        new_strategies = _projected_replicator_dynamics_step_batch(
+            payoff_tensors,
+            new_strategies,
+            prd_dt,
+            prd_gamma,
+            use_approx,
+            subscripts,
+            paths,
+        )
+        if average_over_last_n_strategies is None:
+            sum_strategies += new_strategies
+        else:
+            meta_strategy_window.append(new_strategies)
+    if average_over_last_n_strategies is None:
+        return sum_strategies / prd_iterations
+    return np.mean(meta_strategy_window, axis=0)
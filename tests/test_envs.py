@@ -0,0 +1,60 @@
+import numpy as np
+
+from configs import get_parser
+from game2graph.game_data import gen_game_datasets
+from game_envs.envs import game_env
+
+
+def _game_args(*argv):
+    return get_parser().parse_args(
+        [
+            "--game_generator",
+            "cp",
+            "--min_players",
+            "2",
+            "--max_players",
+            "2",
+            "--min_actions",
+            "5",
+            "--max_actions",
+            "5",
+            "--train_number",
+            "4",
+            "--test_number",
+            "0",
+            "--solver_cache_size",
+            "0",
+        ]
+        + list(argv)
+    )
+
+
+def _run_steps(args, num_steps):
+    np.random.seed(args.seed)
+    train_dataset, _ = gen_game_datasets(args)
+    env = game_env(train_dataset, args)
+    env.reset()
+    for _ in range(num_steps):
+        env.step(np.random.randn(args.action_size))
+    return env
+
+
+def test_alpha_rank_sweep_warm_start_keeps_epsilon_bounded():
+    args = _game_args(
+        "--meta_solver",
+        "alpha_rank",
+        "--alpharank_method",
+        "sweep",
+        "--warm_start_solver",
+        "--max_steps",
+        "50",
+    )
+    env = _run_steps(args, 50)
+    assert 1e-10 < env.solver_state <= 0.5
+
+
+def test_alpha_rank_sink_scc_warm_start_runs_50_steps():
+    args = _game_args(
+        "--meta_solver", "alpha_rank", "--warm_start_solver", "--max_steps", "50"
+    )
+    _run_steps(args, 50)
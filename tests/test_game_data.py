@@ -0,0 +1,59 @@
+import numpy as np
+
+from configs import get_parser
+from game2graph.game_data import cache_game_stats, gen_game_datasets
+from game_envs import envs
+from game_envs.envs import precompute_game_stats
+
+
+def _cached_args(cache_dir):
+    return get_parser().parse_args(
+        [
+            "--dataset_cache_dir",
+            str(cache_dir),
+            "--game_generator",
+            "cp",
+            "--train_number",
+            "6",
+            "--test_number",
+            "4",
+            "--meta_solver",
+            "prd",
+            "--prd_iterations",
+            "100",
+            "--solver_cache_size",
+            "0",
+        ]
+    )
+
+
+def _load_and_precompute(args):
+    """Mirrors the dataset setup of the main scripts."""
+    train_dataset, test_dataset = gen_game_datasets(args)
+    test_dataset = precompute_game_stats(test_dataset, args)
+    cache_game_stats(args, train_dataset, test_dataset)
+    return train_dataset, test_dataset
+
+
+def test_precomputed_game_stats_round_trip_through_cache(tmp_path, monkeypatch):
+    args = _cached_args(tmp_path)
+    train_dataset, test_dataset = _load_and_precompute(args)
+
+    solves = []
+    solve = envs.game_env._solve
+    monkeypatch.setattr(
+        envs.game_env, "_solve", lambda self: solves.append(1) or solve(self)
+    )
+    cached_train, cached_test = _load_and_precompute(args)
+
+    assert not solves
+    assert all(len(game) == 3 for game in cached_train)
+    for game, cached_game in zip(test_dataset, cached_test):
+        np.testing.assert_array_equal(game[0], cached_game[0])
+        init_nc = game[3]["init_solve"]["prd"][0]
+        assert cached_game[3]["init_solve"]["prd"][0] == init_nc
+
+    # Other solver settings do not reuse the stats
+    args.prd_iterations = 200
+    _load_and_precompute(args)
+    assert len(solves) == len(test_dataset)
@@ -0,0 +1,69 @@
+import numpy as np
+
+from solvers import ce_strategy, fictitious_play_strategy
+from solvers.eval import nash_conv
+from utils import normalize_tables
+
+
+def _nearby_games(num_games, shape=(2, 5, 5), scale=0.02, seed=0):
+    """Yields pairs of games, the second one a small perturbation of the first."""
+    rng = np.random.RandomState(seed)
+    for _ in range(num_games):
+        game = normalize_tables(rng.random_sample(shape), max_val=1.0, min_val=-1.0)
+        nearby_game = normalize_tables(
+            game + scale * rng.standard_normal(shape), max_val=1.0, min_val=-1.0
+        )
+        yield game, nearby_game
+
+
+def test_fp_warm_start_reaches_nash_conv_in_fewer_iterations():
+    kwargs = dict(
+        max_iterations=5000,
+        tol=0.05,
+        check_every=50,
+        convergence_metric="nash_conv",
+        return_iterations=True,
+    )
+    cold_iterations, warm_iterations = 0, 0
+    for game, nearby_game in _nearby_games(10):
+        strategies, iterations = fictitious_play_strategy(game, **kwargs)
+        cold, cold_iters = fictitious_play_strategy(nearby_game, **kwargs)
+        warm, warm_iters = fictitious_play_strategy(
+            nearby_game,
+            initial_strategies=strategies,
+            initial_weight=iterations,
+            **kwargs
+        )
+        assert warm_iters < kwargs["max_iterations"]
+        assert sum(nash_conv(nearby_game, warm)) < kwargs["tol"]
+        cold_iterations += cold_iters
+        warm_iterations += warm_iters
+    assert warm_iterations < cold_iterations
+
+
+def test_ce_warm_start_resumes_regrets():
+    kwargs = dict(
+        iterations=5000,
+        tol=1e-3,
+        check_every=50,
+        method="regret_matching",
+        return_regrets=True,
+        return_iterations=True,
+    )
+    cold_iterations, warm_iterations = 0, 0
+    cold_nash_conv, warm_nash_conv = 0.0, 0.0
+    for game, nearby_game in _nearby_games(10):
+        strategies, regrets, _ = ce_strategy(game, **kwargs)
+        cold, _, cold_iters = ce_strategy(nearby_game, **kwargs)
+        warm, _, warm_iters = ce_strategy(
+            nearby_game,
+            initial_strategies=strategies,
+            initial_regrets=regrets,
+            **kwargs
+        )
+        cold_iterations += cold_iters
+        warm_iterations += warm_iters
+        cold_nash_conv += sum(nash_conv(nearby_game, cold))
+        warm_nash_conv += sum(nash_conv(nearby_game, warm))
+    assert warm_iterations < cold_iterations
+    assert warm_nash_conv <= cold_nash_conv * 1.05